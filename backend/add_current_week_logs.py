@@ -11,6 +11,8 @@ from sqlalchemy.orm import Session
 from app.database import SessionLocal
 from app.models.user import User
 from app.models.habit import Habit, HabitLog
+from app.services.log_indexes import rebuild_log_indexes
+from app.services.rollups import rebuild_daily_rollups
 
 def add_current_week_logs():
     """Add some habit logs for the current week"""
@@ -76,6 +78,9 @@ def add_current_week_logs():
                 else:
                     print(f"  Log already exists for {log_date}")
         
+        db.commit()
+        rebuild_log_indexes(db, [habit.id for habit in habits[:4]])
+        rebuild_daily_rollups(db, {habit.user_id for habit in habits[:4]})
         db.commit()
         print(f"\n✓ Added {logs_added} new logs for current week")
         
@@ -25,6 +25,10 @@ from app.models.user import User
 from app.models.habit import Habit, HabitLog
 from app.models.habit_summary import HabitSummary
 from app.models.identity import Identity
+from app.models.habit_bitmap import HabitLogBitmap
+from app.models.streak_run import HabitStreakRun
+from app.models.idempotency import IdempotencyKey
+from app.models.daily_rollup import UserDailyRollup
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
@@ -0,0 +1,59 @@
+"""Add habit log bitmaps
+
+Revision ID: 3f1a9c2d7b41
+Revises: 10c3de3c85bf
+Create Date: 2026-10-17 09:12:05.412310
+
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2d7b41'
+down_revision: Union[str, None] = '10c3de3c85bf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BITMAP_BYTES = 46
+
+
+def upgrade() -> None:
+    bitmaps = op.create_table('habit_log_bitmaps',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('habit_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('bits', sa.LargeBinary(length=BITMAP_BYTES), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('habit_id', 'year', name='uq_habit_log_bitmaps_habit_year')
+    )
+    op.create_index(op.f('ix_habit_log_bitmaps_id'), 'habit_log_bitmaps', ['id'], unique=False)
+    op.create_index(op.f('ix_habit_log_bitmaps_user_id'), 'habit_log_bitmaps', ['user_id'], unique=False)
+
+    # Backfill from existing logs
+    rows = op.get_bind().execute(sa.text(
+        "SELECT DISTINCT user_id, habit_id, DATE(completed_date) FROM habit_logs"
+    ))
+    years = defaultdict(int)
+    for user_id, habit_id, day in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        years[(user_id, habit_id, day.year)] |= 1 << (day.timetuple().tm_yday - 1)
+    if years:
+        op.bulk_insert(bitmaps, [
+            {"user_id": user_id, "habit_id": habit_id, "year": year, "bits": bits.to_bytes(BITMAP_BYTES, "little")}
+            for (user_id, habit_id, year), bits in years.items()
+        ])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_habit_log_bitmaps_user_id'), table_name='habit_log_bitmaps')
+    op.drop_index(op.f('ix_habit_log_bitmaps_id'), table_name='habit_log_bitmaps')
+    op.drop_table('habit_log_bitmaps')
@@ -0,0 +1,44 @@
+"""Add the (user_id, habit_id, summary_date) unique key to habit_summary
+
+Revision ID: 7d3f5a91c0b8
+Revises: e2b7f93c5a60
+Create Date: 2026-10-17 18:31:57.552108
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3f5a91c0b8'
+down_revision: Union[str, None] = 'e2b7f93c5a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # Summaries are keyed by day, stored as midnight
+    bind.execute(sa.text("UPDATE habit_summary SET summary_date = DATE(summary_date)"))
+
+    # Drop duplicate summaries for the same habit and day, keeping the newest one
+    duplicates = bind.execute(sa.text(
+        "SELECT user_id, habit_id, summary_date, MAX(id) FROM habit_summary "
+        "GROUP BY user_id, habit_id, summary_date HAVING COUNT(*) > 1"
+    )).fetchall()
+    for user_id, habit_id, summary_date, keep_id in duplicates:
+        bind.execute(
+            sa.text(
+                "DELETE FROM habit_summary "
+                "WHERE user_id = :user_id AND habit_id = :habit_id "
+                "AND summary_date = :summary_date AND id <> :keep_id"
+            ),
+            {"user_id": user_id, "habit_id": habit_id, "summary_date": summary_date, "keep_id": keep_id}
+        )
+
+    op.create_unique_constraint('uq_habit_summary_user_habit_date', 'habit_summary', ['user_id', 'habit_id', 'summary_date'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_habit_summary_user_habit_date', 'habit_summary', type_='unique')
@@ -0,0 +1,72 @@
+"""Add habit streak runs
+
+Revision ID: 8b2e4d6f1a93
+Revises: 3f1a9c2d7b41
+Create Date: 2026-10-17 11:40:27.903114
+
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a93'
+down_revision: Union[str, None] = '3f1a9c2d7b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    runs_table = op.create_table('habit_streak_runs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('habit_id', sa.Integer(), nullable=False),
+    sa.Column('start_day', sa.Date(), nullable=False),
+    sa.Column('end_day', sa.Date(), nullable=False),
+    sa.Column('length', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['habit_id'], ['habits.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('habit_id', 'start_day', name='uq_habit_streak_runs_habit_start')
+    )
+    op.create_index(op.f('ix_habit_streak_runs_id'), 'habit_streak_runs', ['id'], unique=False)
+    op.create_index(op.f('ix_habit_streak_runs_user_id'), 'habit_streak_runs', ['user_id'], unique=False)
+    op.create_index('ix_habit_streak_runs_habit_end', 'habit_streak_runs', ['habit_id', 'end_day'], unique=False)
+    op.create_index('ix_habit_streak_runs_habit_length', 'habit_streak_runs', ['habit_id', 'length'], unique=False)
+
+    # Backfill from existing logs
+    rows = op.get_bind().execute(sa.text(
+        "SELECT DISTINCT user_id, habit_id, DATE(completed_date) AS day FROM habit_logs ORDER BY habit_id, day"
+    ))
+    runs = defaultdict(list)
+    for user_id, habit_id, day in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        habit_runs = runs[(user_id, habit_id)]
+        if habit_runs and habit_runs[-1][1] == day - timedelta(days=1):
+            habit_runs[-1][1] = day
+        else:
+            habit_runs.append([day, day])
+    if runs:
+        op.bulk_insert(runs_table, [
+            {
+                "user_id": user_id,
+                "habit_id": habit_id,
+                "start_day": start_day,
+                "end_day": end_day,
+                "length": (end_day - start_day).days + 1,
+            }
+            for (user_id, habit_id), habit_runs in runs.items()
+            for start_day, end_day in habit_runs
+        ])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_habit_streak_runs_habit_length', table_name='habit_streak_runs')
+    op.drop_index('ix_habit_streak_runs_habit_end', table_name='habit_streak_runs')
+    op.drop_index(op.f('ix_habit_streak_runs_user_id'), table_name='habit_streak_runs')
+    op.drop_index(op.f('ix_habit_streak_runs_id'), table_name='habit_streak_runs')
+    op.drop_table('habit_streak_runs')
@@ -0,0 +1,25 @@
+"""Add users.token_version
+
+Revision ID: 9c4e7b2a1d58
+Revises: f3a9d1c6e274
+Create Date: 2026-10-17 21:05:12.730164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '9c4e7b2a1d58'
+down_revision: Union[str, None] = 'f3a9d1c6e274'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
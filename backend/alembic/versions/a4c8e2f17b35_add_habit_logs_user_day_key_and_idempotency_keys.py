@@ -0,0 +1,49 @@
+"""Key habit_logs on (user_id, habit_id, completed_day) and add idempotency_keys
+
+Revision ID: a4c8e2f17b35
+Revises: 5e9b0c3a4d12
+Create Date: 2026-10-17 17:05:41.273519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e2f17b35'
+down_revision: Union[str, None] = '5e9b0c3a4d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create the new indexes first: on MySQL the old one may be backing the habit_id foreign key
+    op.create_unique_constraint('uq_habit_logs_user_habit_day', 'habit_logs', ['user_id', 'habit_id', 'completed_day'])
+    op.create_index(op.f('ix_habit_logs_habit_id'), 'habit_logs', ['habit_id'], unique=False)
+    op.drop_index('ix_habit_logs_habit_day', table_name='habit_logs')
+
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key')
+    )
+    op.create_index(op.f('ix_idempotency_keys_id'), 'idempotency_keys', ['id'], unique=False)
+    op.create_index(op.f('ix_idempotency_keys_created_at'), 'idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_idempotency_keys_created_at'), table_name='idempotency_keys')
+    op.drop_index(op.f('ix_idempotency_keys_id'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+
+    op.create_index('ix_habit_logs_habit_day', 'habit_logs', ['habit_id', 'completed_day'], unique=True)
+    op.drop_index(op.f('ix_habit_logs_habit_id'), table_name='habit_logs')
+    op.drop_constraint('uq_habit_logs_user_habit_day', 'habit_logs', type_='unique')
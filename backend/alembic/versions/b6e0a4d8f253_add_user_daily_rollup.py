@@ -0,0 +1,51 @@
+"""Add user_daily_rollup and index habit_logs on (user_id, completed_day)
+
+Revision ID: b6e0a4d8f253
+Revises: 7d3f5a91c0b8
+Create Date: 2026-10-17 19:14:36.088245
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e0a4d8f253'
+down_revision: Union[str, None] = '7d3f5a91c0b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_habit_logs_user_day', 'habit_logs', ['user_id', 'completed_day'], unique=False)
+
+    op.create_table('user_daily_rollup',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('completions', sa.Integer(), nullable=False),
+    sa.Column('active_habits', sa.Integer(), nullable=False),
+    sa.Column('habits_completed', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'day', name='uq_user_daily_rollup_user_day')
+    )
+    op.create_index(op.f('ix_user_daily_rollup_id'), 'user_daily_rollup', ['id'], unique=False)
+
+    # Backfill from existing logs
+    op.get_bind().execute(sa.text(
+        "INSERT INTO user_daily_rollup (user_id, day, completions, active_habits, habits_completed) "
+        "SELECT l.user_id, l.completed_day, COUNT(*), "
+        "(SELECT COUNT(*) FROM habits a WHERE a.user_id = l.user_id AND a.is_active), "
+        "SUM(CASE WHEN h.is_active THEN 1 ELSE 0 END) "
+        "FROM habit_logs l JOIN habits h ON h.id = l.habit_id "
+        "GROUP BY l.user_id, l.completed_day"
+    ))
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_daily_rollup_id'), table_name='user_daily_rollup')
+    op.drop_table('user_daily_rollup')
+    op.drop_index('ix_habit_logs_user_day', table_name='habit_logs')
@@ -0,0 +1,46 @@
+"""Add habit_logs.completed_day with unique (habit_id, completed_day) index
+
+Revision ID: c7d51e08a2f6
+Revises: 8b2e4d6f1a93
+Create Date: 2026-10-17 14:05:51.227480
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d51e08a2f6'
+down_revision: Union[str, None] = '8b2e4d6f1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('habit_logs', sa.Column('completed_day', sa.Date(), nullable=True))
+
+    bind = op.get_bind()
+    bind.execute(sa.text("UPDATE habit_logs SET completed_day = DATE(completed_date)"))
+
+    # Drop duplicate logs for the same habit and day, keeping the oldest one
+    duplicates = bind.execute(sa.text(
+        "SELECT habit_id, completed_day, MIN(id) FROM habit_logs "
+        "GROUP BY habit_id, completed_day HAVING COUNT(*) > 1"
+    )).fetchall()
+    for habit_id, completed_day, keep_id in duplicates:
+        bind.execute(
+            sa.text(
+                "DELETE FROM habit_logs "
+                "WHERE habit_id = :habit_id AND completed_day = :completed_day AND id <> :keep_id"
+            ),
+            {"habit_id": habit_id, "completed_day": completed_day, "keep_id": keep_id}
+        )
+
+    op.alter_column('habit_logs', 'completed_day', existing_type=sa.Date(), nullable=False)
+    op.create_index('ix_habit_logs_habit_day', 'habit_logs', ['habit_id', 'completed_day'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_habit_logs_habit_day', table_name='habit_logs')
+    op.drop_column('habit_logs', 'completed_day')
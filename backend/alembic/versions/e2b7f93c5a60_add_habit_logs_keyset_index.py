@@ -0,0 +1,28 @@
+"""Index habit_logs on (habit_id, completed_date, id) for keyset pagination
+
+Revision ID: e2b7f93c5a60
+Revises: a4c8e2f17b35
+Create Date: 2026-10-17 17:48:12.904377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7f93c5a60'
+down_revision: Union[str, None] = 'a4c8e2f17b35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The new index leads with habit_id, so it also backs the habit_id foreign key
+    op.create_index('ix_habit_logs_habit_completed', 'habit_logs', ['habit_id', 'completed_date', 'id'], unique=False)
+    op.drop_index(op.f('ix_habit_logs_habit_id'), table_name='habit_logs')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_habit_logs_habit_id'), 'habit_logs', ['habit_id'], unique=False)
+    op.drop_index('ix_habit_logs_habit_completed', table_name='habit_logs')
@@ -0,0 +1,25 @@
+"""Add users.data_version
+
+Revision ID: f3a9d1c6e274
+Revises: b6e0a4d8f253
+Create Date: 2026-10-17 19:48:37.204519
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9d1c6e274'
+down_revision: Union[str, None] = 'b6e0a4d8f253'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'data_version')
@@ -1,41 +1,55 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 from jose import JWTError, jwt
-import hashlib
-import secrets
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from app.cache import LRUCache
 from app.config import settings
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.models.user import User
 from app.schemas.user import TokenData
-
-# Simple password hashing using hashlib (for development)
-def hash_password_simple(password: str) -> str:
-    """Simple password hashing for development"""
-    salt = secrets.token_hex(16)
-    pwd_hash = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000)
-    return f"{salt}:{pwd_hash.hex()}"
-
-def verify_password_simple(password: str, hashed: str) -> bool:
-    """Verify password against simple hash"""
-    try:
-        salt, pwd_hash = hashed.split(':')
-        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), 100000).hex() == pwd_hash
-    except:
-        return False
+from app.services import passwords
+from app.services.passwords import HasherBusy, password_hasher
 
 # JWT token scheme
 security = HTTPBearer()
 
+@dataclass(frozen=True)
+class Principal:
+    """Snapshot of the authenticated user, safe to share between requests."""
+    id: int
+    email: str
+    name: Optional[str]
+    is_active: bool
+    token_version: int
+
+# user_id -> Principal; entries are checked against the token's version
+principal_cache = LRUCache(settings.principal_cache_size, settings.principal_cache_ttl)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return verify_password_simple(plain_password, hashed_password)
+    """Verify a password against its hash, inline. Request handlers go through the hasher instead."""
+    return passwords.verify_password(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Hash a password"""
-    return hash_password_simple(password)
+    """Hash a password, inline. Request handlers go through the hasher instead."""
+    return passwords.hash_password(password)
+
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": str(settings.password_hash_retry_after)},
+    )
+
+async def run_hasher_async(fn, *args):
+    """Run a password hashing function on the bounded hasher pool, answering 503 when it is full"""
+    try:
+        return await password_hasher.run(fn, *args)
+    except HasherBusy:
+        raise _hasher_busy()
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
@@ -49,7 +63,14 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def create_user_token(user: User, expires_delta: Optional[timedelta] = None) -> str:
+    """Access token carrying the user's id and token version, so requests can be authenticated from the cache"""
+    return create_access_token(
+        data={"sub": user.email, "uid": user.id, "ver": user.token_version or 0},
+        expires_delta=expires_delta
+    )
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify JWT token and return token data"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,15 +82,66 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
-        token_data = TokenData(email=email)
+        token_data = TokenData(email=email, user_id=payload.get("uid"), token_version=payload.get("ver"))
     except JWTError:
         raise credentials_exception
     
     return token_data
 
-def get_current_user(db: Session = Depends(get_db), token_data: TokenData = Depends(verify_token)):
-    """Get current authenticated user"""
-    user = db.query(User).filter(User.email == token_data.email).first()
+def invalidate_principal(user_id: int):
+    """Drop the user's cached principal after a profile or password change. Other workers catch up within the TTL."""
+    principal_cache.delete(user_id)
+
+def _load_token_user(token_data: TokenData) -> Optional[User]:
+    with SessionLocal() as db:
+        if token_data.user_id is not None:
+            user = db.query(User).filter(User.id == token_data.user_id).first()
+        else:
+            # Tokens issued before they carried a user id
+            user = db.query(User).filter(User.email == token_data.email).first()
+        if user is not None:
+            db.expunge(user)
+        return user
+
+async def get_current_user(token_data: TokenData = Depends(verify_token)) -> Principal:
+    """
+    Get current authenticated user.
+    Tokens carrying a user id are served from the principal cache without a thread hop; the
+    database is only read on a miss. Tokens issued before a password change carry an older
+    version and are rejected; so are tokens without a version once the password has changed.
+    """
+    if token_data.user_id is not None:
+        principal = principal_cache.get(token_data.user_id)
+        if principal is not None and principal.token_version == token_data.token_version:
+            return principal
+    user = await run_in_threadpool(_load_token_user, token_data)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    principal = Principal(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        is_active=bool(user.is_active),
+        token_version=user.token_version or 0
+    )
+    # Tokens issued before they carried a user id predate every password change, i.e. version 0
+    token_version = token_data.token_version if token_data.user_id is not None else 0
+    if principal.token_version != token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    if token_data.user_id is not None:
+        principal_cache.set(user.id, principal)
+    return principal
+
+def get_current_db_user(db: Session = Depends(get_db), principal: Principal = Depends(get_current_user)) -> User:
+    """The current user's row, for endpoints that modify the user or return columns that change often"""
+    user = db.query(User).filter(User.id == principal.id).first()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -77,11 +149,33 @@ def get_current_user(db: Session = Depends(get_db), token_data: TokenData = Depe
         )
     return user
 
-def authenticate_user(db: Session, email: str, password: str):
-    """Authenticate user with email and password"""
-    user = db.query(User).filter(User.email == email).first()
+def _load_user(email: str) -> Optional[User]:
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.email == email).first()
+        if user is not None:
+            db.expunge(user)
+        return user
+
+def _store_rehash(user_id: int, old_hash: str, new_hash: str):
+    with SessionLocal() as db:
+        # Skipped if the password changed meanwhile
+        db.query(User).filter(User.id == user_id, User.hashed_password == old_hash).update(
+            {User.hashed_password: new_hash}, synchronize_session=False
+        )
+        db.commit()
+
+async def authenticate_user(email: str, password: str):
+    """
+    Authenticate user with email and password.
+    No database session is held while the password is hashed. Hashes in an older format
+    or with another cost than configured are replaced after a successful login.
+    """
+    user = await run_in_threadpool(_load_user, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await run_hasher_async(passwords.verify_password, password, user.hashed_password):
         return False
+    if passwords.needs_rehash(user.hashed_password):
+        new_hash = await run_hasher_async(passwords.hash_password, password)
+        await run_in_threadpool(_store_rehash, user.id, user.hashed_password, new_hash)
     return user
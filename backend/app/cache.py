@@ -0,0 +1,188 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date
+from typing import Any, Callable, Dict, Optional
+from fastapi.encoders import jsonable_encoder
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a size bound and a per-entry TTL. Counts its hits and misses."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl
+        }
+
+
+class LocalBackend:
+    """
+    Stand-in for a shared cache that keeps serialized values in process memory.
+    Used in tests and single-worker deployments; behaves like the Redis backend.
+    """
+
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._values.pop(key, None)
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl: float):
+        with self._lock:
+            self._values[key] = (time.monotonic() + ttl, value)
+
+
+class RedisBackend:
+    """Cache shared between workers, stored in Redis. Requires the redis package."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the redis package (pip install redis)") from e
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.client.get(key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl: float):
+        self.client.set(key, value, ex=max(int(ttl), 1))
+
+
+def make_shared_backend(kind: str, url: str = ""):
+    """The shared backend named by CACHE_BACKEND, or None to cache in process only."""
+    if kind in ("", "none"):
+        return None
+    if kind == "local":
+        return LocalBackend()
+    if kind == "redis":
+        return RedisBackend(url)
+    raise ValueError(f"Unknown cache backend: {kind}")
+
+
+class ResultCache:
+    """
+    Per-user cache of JSON results keyed by the user's data version and today's date.
+    Writes bump the version, so stale entries are never read and simply age out.
+    Looks in the in-process LRU first, then the shared backend, then computes.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float, shared=None):
+        self.name = name
+        self.ttl = ttl
+        self.local = LRUCache(maxsize, ttl)
+        self.shared = shared
+        self._counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "shared_hits": 0, "misses": 0, "errors": 0})
+        self._lock = threading.Lock()
+
+    def _count(self, namespace: str, outcome: str):
+        with self._lock:
+            self._counts[namespace][outcome] += 1
+
+    def get_or_compute(self, namespace: str, user_id: int, version: int, params: Any, compute: Callable[[], Any], today: Optional[date] = None):
+        key = f"{self.name}:{namespace}:{user_id}:{version}:{today or date.today()}:{json.dumps(jsonable_encoder(params), sort_keys=True)}"
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            self._count(namespace, "hits")
+            return value
+
+        if self.shared is not None:
+            try:
+                serialized = self.shared.get(key)
+            except Exception:
+                # The shared cache is an optimization; fall back to computing
+                logger.exception(f"Shared cache read failed for {key}")
+                serialized = None
+                self._count(namespace, "errors")
+            if serialized is not None:
+                value = json.loads(serialized)
+                self.local.set(key, value)
+                self._count(namespace, "shared_hits")
+                return value
+
+        self._count(namespace, "misses")
+        value = jsonable_encoder(compute())
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, json.dumps(value), self.ttl)
+            except Exception:
+                logger.exception(f"Shared cache write failed for {key}")
+                self._count(namespace, "errors")
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            endpoints = {namespace: dict(counts) for namespace, counts in self._counts.items()}
+        totals = {outcome: sum(counts[outcome] for counts in endpoints.values()) for outcome in ("hits", "shared_hits", "misses", "errors")}
+        return {
+            **totals,
+            "entries": len(self.local),
+            "maxsize": self.local.maxsize,
+            "ttl": self.ttl,
+            "shared_backend": type(self.shared).__name__ if self.shared is not None else None,
+            "endpoints": endpoints
+        }
+
+
+summary_cache = ResultCache(
+    "summary",
+    maxsize=settings.summary_cache_size,
+    ttl=settings.summary_cache_ttl,
+    shared=make_shared_backend(settings.cache_backend, settings.cache_url)
+)
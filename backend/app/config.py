@@ -8,6 +8,23 @@ load_dotenv()
 class Settings(BaseSettings):
     # Database
     database_url: str = os.getenv("DATABASE_URL", "")
+    database_read_url: str = os.getenv("DATABASE_READ_URL", "")  # Optional read replica
+    # Serve the habits and summary routers from AsyncSessions (aiomysql, asyncpg or aiosqlite)
+    database_async: bool = os.getenv("DATABASE_ASYNC", "").lower() in ("1", "true", "yes")
+    database_async_url: str = os.getenv("DATABASE_ASYNC_URL", "")  # Derived from DATABASE_URL when empty
+    # Checked in the background at startup, see /health/ready
+    database_create_tables: bool = os.getenv("DATABASE_CREATE_TABLES", "true").lower() in ("1", "true", "yes")
+    database_warmup_connections: int = int(os.getenv("DATABASE_WARMUP_CONNECTIONS", "2"))
+    # Connection pools, per engine. Size them against the threads or tasks that use them (see /metrics)
+    database_pool_size: int = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    database_max_overflow: int = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+    database_pool_timeout: float = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))  # Seconds to wait for a connection
+    database_pool_recycle: int = int(os.getenv("DATABASE_POOL_RECYCLE", "300"))
+    database_pool_pre_ping: bool = os.getenv("DATABASE_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")  # Off: rely on recycle
+    # Threads running sync endpoints; AnyIO's default is 40. Empty keeps the default
+    threadpool_tokens: int = int(os.getenv("THREADPOOL_TOKENS", "0"))
+    # /metrics exposes pool, cache and hasher internals; served only with "Authorization: Bearer <METRICS_TOKEN>", off when empty
+    metrics_token: str = os.getenv("METRICS_TOKEN", "")
     
     # JWT
     secret_key: str = os.getenv("SECRET_KEY", "habitflow-secret-key")
@@ -21,6 +38,25 @@ class Settings(BaseSettings):
     def cors_origins(self) -> List[str]:
         return [origin.strip() for origin in self.allowed_origins.split(",")]
     
+    # Seconds a habit's summary recompute waits so that rapid toggles collapse into one
+    summary_queue_delay: float = float(os.getenv("SUMMARY_QUEUE_DELAY", "2.0"))
+
+    # Summary result cache: in-process LRU, optionally backed by a cache shared between workers
+    summary_cache_size: int = int(os.getenv("SUMMARY_CACHE_SIZE", "2048"))
+    summary_cache_ttl: float = float(os.getenv("SUMMARY_CACHE_TTL", "300"))
+    cache_backend: str = os.getenv("CACHE_BACKEND", "")  # "", "local" or "redis"
+    cache_url: str = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+
+    # Authenticated users cached per worker; a password change elsewhere takes effect here within the TTL
+    principal_cache_size: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    principal_cache_ttl: float = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+
+    # Password hashing runs on its own pool; logins beyond workers + max pending get a 503
+    password_hash_iterations: int = int(os.getenv("PASSWORD_HASH_ITERATIONS", "100000"))
+    password_hash_workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    password_hash_max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    password_hash_retry_after: int = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", "1"))
+    
     # Environment
     environment: str = os.getenv("ENVIRONMENT", "development")
     
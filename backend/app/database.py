@@ -1,38 +1,197 @@
-from sqlalchemy import create_engine, text
+import bisect
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, List
+from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, exc, func
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
-logger.info(f"🔍 Connecting to MySQL...")
-logger.info(f"🔍 Database URL: {settings.database_url[:50]}...")
-
-try:
-    engine = create_engine(
-        settings.database_url,
-        echo=settings.environment == "development",
-        pool_pre_ping=True,
-        pool_recycle=300,
-        pool_size=5,
-        max_overflow=10,
-    )
-    
-    # Test the connection
-    with engine.connect() as conn:
-        result = conn.execute(text("SELECT 'MySQL Connected', VERSION()"))
-        row = result.fetchone()
-        logger.info(f"✅ MySQL connection successful!")
-        logger.info(f"📊 Status: {row[0]}")
-        logger.info(f"🗄️  Version: {row[1][:60]}...")
-        
-except Exception as e:
-    logger.error(f"❌ MySQL connection failed: {e}")
-    logger.error("🚫 Database connection failed - please check your MySQL setup and connection string.")
-    raise e
-
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Upper bounds, in seconds, of the pool wait-time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class PoolMetrics:
+    """Checkout counters and wait-time histogram of one connection pool"""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip([*map(str, WAIT_BUCKETS), "+Inf"], self.wait_buckets):
+                cumulative += count
+                buckets[bound] = cumulative
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds": {
+                    "count": cumulative,
+                    "sum": round(self.wait_sum, 6),
+                    "max": round(self.wait_max, 6),
+                    "buckets": buckets
+                }
+            }
+
+# Keyed by the pool's logging name, which survives the pool being recreated on dispose
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+class _InstrumentedPool:
+    """Times every wait for a connection and counts pool timeouts"""
+
+    def _do_get(self):
+        metrics = pool_metrics.setdefault(self._orig_logging_name, PoolMetrics())
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        metrics.record(time.perf_counter() - started)
+        return connection
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+def _pool_options(name: str, poolclass) -> dict:
+    return {
+        "echo": settings.environment == "development",
+        "poolclass": poolclass,
+        "pool_logging_name": name,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+    }
+
+def _create_engine(url: str, name: str):
+    # Creating an engine opens no connection; the first checkout does
+    return create_engine(url, **_pool_options(name, InstrumentedQueuePool))
+
+def _create_async_engine(url: str, name: str):
+    return create_async_engine(url, **_pool_options(name, InstrumentedAsyncQueuePool))
+
+def pool_stats() -> Dict[str, dict]:
+    """Occupancy and wait metrics of every pool created so far"""
+    with _engines_lock:
+        # The read engines fall back to the primary ones when no replica is configured
+        engines = {id(engine): engine for engine in _engines.values()}
+    stats = {}
+    for engine in engines.values():
+        pool = getattr(engine, "sync_engine", engine).pool
+        name = pool._orig_logging_name
+        stats[name] = {
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            **pool_metrics.get(name, PoolMetrics()).as_dict()
+        }
+    return stats
+
+# Async drivers for the sync drivers in DATABASE_URL
+ASYNC_DRIVERS = {"mysql": "aiomysql", "postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_database_url(url: str) -> str:
+    """The URL with its driver swapped for the dialect's async driver"""
+    url = make_url(url)
+    return url.set(drivername=f"{url.get_backend_name()}+{ASYNC_DRIVERS[url.get_backend_name()]}").render_as_string(hide_password=False)
+
+# Engines are built on first use, so importing the app costs no database round trip
+_engines: Dict[str, Any] = {}
+_engines_lock = threading.RLock()
+
+def _engine(name: str, build: Callable):
+    with _engines_lock:
+        if name not in _engines:
+            _engines[name] = build()
+        return _engines[name]
+
+def get_engine():
+    return _engine("engine", lambda: _create_engine(settings.database_url, "primary"))
+
+def get_read_engine():
+    """Read-only endpoints can be pointed at a replica; without one they use the primary"""
+    return _engine("read_engine", lambda: _create_engine(settings.database_read_url, "read") if settings.database_read_url else get_engine())
+
+def get_async_engine():
+    """DATABASE_ASYNC=1 serves the habits and summary routers from AsyncSessions on the event loop"""
+    if not settings.database_async:
+        return None
+    return _engine("async_engine", lambda: _create_async_engine(settings.database_async_url or async_database_url(settings.database_url), "async"))
+
+def get_async_read_engine():
+    if not settings.database_async:
+        return None
+    return _engine("async_read_engine", lambda: _create_async_engine(async_database_url(settings.database_read_url), "async_read") if settings.database_read_url else get_async_engine())
+
+_ENGINE_GETTERS = {
+    "engine": get_engine,
+    "read_engine": get_read_engine,
+    "async_engine": get_async_engine,
+    "async_read_engine": get_async_read_engine,
+}
+
+def __getattr__(name: str):
+    # Keeps ``from app.database import engine`` working while engines are lazy
+    if name in _ENGINE_GETTERS:
+        return _ENGINE_GETTERS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class _LazyBind:
+    """Session factory that binds to its engine when the first session is made"""
+
+    def __init__(self, get_bind: Callable, **kw):
+        super().__init__(**kw)
+        self._get_bind = get_bind
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=self._get_bind())
+        return super().__call__(**local_kw)
+
+class _LazySessionmaker(_LazyBind, sessionmaker):
+    pass
+
+class _LazyAsyncSessionmaker(_LazyBind, async_sessionmaker):
+    pass
+
+SessionLocal = _LazySessionmaker(get_engine, autocommit=False, autoflush=False)
+ReadSessionLocal = _LazySessionmaker(get_read_engine, autocommit=False, autoflush=False)
+AsyncSessionLocal = _LazyAsyncSessionmaker(get_async_engine, autoflush=False)
+AsyncReadSessionLocal = _LazyAsyncSessionmaker(get_async_read_engine, autoflush=False)
 Base = declarative_base()
 
 def get_db():
@@ -41,4 +200,178 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db():
+    """Dependency to get a database session for read-only endpoints"""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def _load_results(db: Session, result):
+    """Load expired or deferred columns of ORM objects in a result while the session can still do IO"""
+    if isinstance(result, dict):
+        for value in result.values():
+            _load_results(db, value)
+    elif isinstance(result, (list, tuple)):
+        for value in result:
+            _load_results(db, value)
+    else:
+        state = sa_inspect(result, raiseerr=False)
+        if state is not None and getattr(state, "session", None) is db and not state.deleted:
+            if state.unloaded & set(state.mapper.column_attrs.keys()):
+                db.refresh(result)
+    return result
+
+class DBRunner:
+    """
+    Runs code written against a sync Session from an async endpoint: on the event loop through
+    AsyncSession.run_sync in async mode, on the threadpool with a plain Session otherwise.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        """Call ``fn(session, *args, **kwargs)``; ORM objects in the result come back fully loaded."""
+        def call(db: Session):
+            return _load_results(db, fn(db, *args, **kwargs))
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(call)
+        return await run_in_threadpool(call, self.session)
+
+async def get_db_runner():
+    """Dependency to get a DBRunner on the primary"""
+    if settings.database_async:
+        async with AsyncSessionLocal() as session:
+            yield DBRunner(session)
+    else:
+        db = SessionLocal()
+        try:
+            yield DBRunner(db)
+        finally:
+            await run_in_threadpool(db.close)
+
+async def get_read_db_runner():
+    """Dependency to get a DBRunner for read-only endpoints"""
+    if settings.database_async:
+        async with AsyncReadSessionLocal() as session:
+            yield DBRunner(session)
+    else:
+        db = ReadSessionLocal()
+        try:
+            yield DBRunner(db)
+        finally:
+            await run_in_threadpool(db.close)
+
+def async_endpoint(endpoint: Callable) -> Callable:
+    """
+    Turn a sync endpoint taking ``db: Session = Depends(get_db or get_read_db)`` into an ``async def``
+    endpoint. Its body runs through a DBRunner, so it needs no request thread in async mode.
+    """
+    signature = inspect.signature(endpoint)
+    runner_dependency = {get_db: get_db_runner, get_read_db: get_read_db_runner}[signature.parameters["db"].default.dependency]
+    parameters = [
+        parameter.replace(annotation=DBRunner, default=Depends(runner_dependency)) if name == "db" else parameter
+        for name, parameter in signature.parameters.items()
+    ]
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, db: DBRunner, **kwargs):
+        return await db.run(lambda session: endpoint(*args, db=session, **kwargs))
+
+    wrapper.__signature__ = signature.replace(parameters=parameters)
+    return wrapper
+
+def insert_ignore(db, model, index_elements: List[str]):
+    """INSERT for the session's dialect that skips rows clashing with the unique key on ``index_elements``"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        return mysql.insert(model).prefix_with("IGNORE")
+    if dialect == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect == "sqlite":
+        return sqlite.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    raise NotImplementedError(f"insert_ignore is not supported on {dialect}")
+
+def upsert(db, model, index_elements: List[str], values: Dict[str, Any], update_columns: List[str]):
+    """Single-statement INSERT that updates ``update_columns`` when the unique key on ``index_elements`` exists"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql.insert(model).values(**values)
+        changes = {column: statement.inserted[column] for column in update_columns}
+        if "updated_at" in model.__table__.c:
+            changes["updated_at"] = func.now()
+        return statement.on_duplicate_key_update(changes)
+    if dialect in ("postgresql", "sqlite"):
+        statement = (postgresql if dialect == "postgresql" else sqlite).insert(model).values(**values)
+        changes = {column: statement.excluded[column] for column in update_columns}
+        if "updated_at" in model.__table__.c:
+            changes["updated_at"] = func.now()
+        return statement.on_conflict_do_update(index_elements=index_elements, set_=changes)
+    raise NotImplementedError(f"upsert is not supported on {dialect}")
+
+class PoolWarmup:
+    """Startup state of the database pools, reported by /health/ready"""
+
+    def __init__(self):
+        self.state = "starting"  # starting -> ready, with "retrying" while the database is unreachable
+        self.attempts = 0
+        self.error = None
+        self.server_version = None
+        self.seconds = None
+        self._started = time.monotonic()
+
+    def as_dict(self) -> dict:
+        engines = dict(_engines)
+        pools = {
+            name: engine.pool.status() for name, engine in engines.items()
+            if not name.startswith("async") and (name == "engine" or engine is not engines.get("engine"))
+        }
+        return {
+            "state": self.state,
+            "attempts": self.attempts,
+            "error": self.error,
+            "server_version": self.server_version,
+            "seconds": self.seconds,
+            "pools": pools
+        }
+
+pool_warmup = PoolWarmup()
+
+def warm_up_database(create_tables: bool, connections: int):
+    """
+    Connect, create missing tables when asked, and open ``connections`` connections in each pool
+    so the first requests don't pay for them. Blocking; the lifespan runs it on the threadpool.
+    """
+    pool_warmup.attempts += 1
+    try:
+        engine = get_engine()
+        with engine.connect() as conn:
+            pool_warmup.server_version = ".".join(str(part) for part in conn.dialect.server_version_info or ())
+        if create_tables:
+            Base.metadata.create_all(bind=engine)
+        for pool_engine in {engine, get_read_engine()}:
+            # Never more than the pool can hand out, or warm-up itself would time out
+            capacity = pool_engine.pool.size() + max(pool_engine.pool._max_overflow, 0)
+            held = [pool_engine.connect() for _ in range(min(connections, capacity))]
+            for conn in held:
+                conn.close()
+    except Exception as e:
+        pool_warmup.state, pool_warmup.error = "retrying", str(e)
+        raise
+    pool_warmup.state, pool_warmup.error = "ready", None
+    pool_warmup.seconds = round(time.monotonic() - pool_warmup._started, 3)
+    logger.info(f"✅ Database ready (server {pool_warmup.server_version}) after {pool_warmup.attempts} attempt(s)")
+
+async def dispose_engines():
+    """Close every pool that was created so no connections or driver threads outlive the app"""
+    with _engines_lock:
+        engines = list({id(engine): engine for engine in _engines.values()}.values())
+    for engine in engines:
+        if isinstance(engine, AsyncEngine):
+            await engine.dispose()
+        else:
+            await run_in_threadpool(engine.dispose)
@@ -1,7 +1,10 @@
+import asyncio
+import anyio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
-from app.database import engine, Base
-from app.routers import auth, habits, users
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import os
@@ -10,23 +13,56 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
 from app.config import settings
-from app.database import engine, Base
-from app.routers import auth, habits, summary, users, identities
-
-# Create database tables
-try:
-    if engine:
-        Base.metadata.create_all(bind=engine)
-        logger.info("✅ Database tables created successfully")
-    else:
-        logger.warning("⚠️  Database engine not available - tables not created")
-except Exception as e:
-    logger.error(f"⚠️  Database table creation failed: {e}")
+from app.database import dispose_engines, pool_warmup, warm_up_database
+from app.routers import auth, habits, summary, users, identities, export, metrics
+from app.services.summary_queue import summary_queue
+
+WARMUP_MAX_DELAY = 30.0
+
+async def _warm_up():
+    """Connect and check the schema, retrying with backoff while the database is unavailable"""
+    delay = 0.5
+    while True:
+        try:
+            await run_in_threadpool(warm_up_database, settings.database_create_tables, settings.database_warmup_connections)
+            return
+        except Exception as e:
+            logger.error(f"⚠️  Database not ready (attempt {pool_warmup.attempts}), retrying in {delay:.1f}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_MAX_DELAY)
+
+def _size_threadpool():
+    # Sync endpoints run on AnyIO's thread limiter; each of those threads may hold a pooled connection
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    if settings.threadpool_tokens:
+        limiter.total_tokens = settings.threadpool_tokens
+    connections = settings.database_pool_size + settings.database_max_overflow
+    if limiter.total_tokens > connections:
+        logger.warning(
+            f"⚠️  {limiter.total_tokens} request threads share {connections} database connections; "
+            f"requests beyond that wait up to {settings.database_pool_timeout}s for one"
+        )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start serving at once and warm the database up in the background; /health/ready reports
+    when it is done. On shutdown, recompute pending summaries and close the pools.
+    """
+    _size_threadpool()
+    # The queue may have been flushed by an earlier lifespan in this process
+    summary_queue.start()
+    warmup = asyncio.create_task(_warm_up())
+    yield
+    warmup.cancel()
+    # Recompute any habit summaries still waiting in the write-behind queue
+    await run_in_threadpool(summary_queue.flush)
+    await dispose_engines()
 
 # Initialize FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="HabitFlow API",
     description="A comprehensive habit tracking API built with FastAPI and PostgreSQL",
     version="1.0.0",
@@ -60,6 +96,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor"],
 )
 
 # Include routers
@@ -68,6 +105,8 @@ app.include_router(identities.router)
 app.include_router(habits.router)
 app.include_router(summary.router)
 app.include_router(users.router)
+app.include_router(export.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def read_root():
@@ -84,6 +123,17 @@ def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "environment": settings.environment}
 
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness: the process is serving requests. Never touches the database."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: the database answered and the pools are warm. 503 until then."""
+    status_code = 200 if pool_warmup.state == "ready" else 503
+    return JSONResponse(status_code=status_code, content=pool_warmup.as_dict())
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
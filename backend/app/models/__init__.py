@@ -1,4 +1,8 @@
 from .user import User
 from .identity import Identity
 from .habit import Habit, HabitLog
-from .habit_summary import HabitSummary
\ No newline at end of file
+from .habit_summary import HabitSummary
+from .habit_bitmap import HabitLogBitmap
+from .streak_run import HabitStreakRun
+from .idempotency import IdempotencyKey
+from .daily_rollup import UserDailyRollup
\ No newline at end of file
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+# Per-user totals for one calendar day, kept in step with habit_logs
+class UserDailyRollup(Base):
+    __tablename__ = "user_daily_rollup"
+    __table_args__ = (
+        UniqueConstraint("user_id", "day", name="uq_user_daily_rollup_user_day"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    completions = Column(Integer, nullable=False, default=0)  # Logs on the day
+    active_habits = Column(Integer, nullable=False, default=0)  # Active habits when the day was last written
+    habits_completed = Column(Integer, nullable=False, default=0)  # Active habits with a log on the day
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
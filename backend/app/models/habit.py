@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, JSON, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey, Text, JSON, Float, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.database import Base
 
@@ -19,6 +19,7 @@ class Habit(Base):
     currentWeek = Column(JSON, default=lambda: [False] * 7) # Store as JSON array of booleans
     consistency_score = Column(Float, default=0.0)
     streak = Column(Integer, default=0)
+    stats_date = Column(Date, nullable=True)  # Day currentWeek, consistency_score and streak were computed for
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -27,14 +28,22 @@ class Habit(Base):
     identity = relationship("Identity", back_populates="habits")
     habit_logs = relationship("HabitLog", back_populates="habit", cascade="all, delete-orphan")
     habit_summaries = relationship("HabitSummary", back_populates="habit", cascade="all, delete-orphan")
+    log_bitmaps = relationship("HabitLogBitmap", back_populates="habit", cascade="all, delete-orphan")
+    streak_runs = relationship("HabitStreakRun", back_populates="habit", cascade="all, delete-orphan")
 
 class HabitLog(Base):
     __tablename__ = "habit_logs"
+    __table_args__ = (
+        UniqueConstraint("user_id", "habit_id", "completed_day", name="uq_habit_logs_user_habit_day"),
+        Index("ix_habit_logs_habit_completed", "habit_id", "completed_date", "id"),
+        Index("ix_habit_logs_user_day", "user_id", "completed_day"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), nullable=False)
     completed_date = Column(DateTime(timezone=True), nullable=False)
+    completed_day = Column(Date, nullable=False)  # Calendar day of completed_date, kept for indexed lookups
     notes = Column(Text)
     used_rest_token = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -42,3 +51,8 @@ class HabitLog(Base):
     # Relationships
     user = relationship("User", back_populates="habit_logs")
     habit = relationship("Habit", back_populates="habit_logs")
+
+    @validates("completed_date")
+    def _set_completed_day(self, key, value):
+        self.completed_day = value.date() if value is not None else None
+        return value
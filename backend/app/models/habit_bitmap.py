@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, LargeBinary, UniqueConstraint
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+# One bit per day of the year (366 days max)
+BITMAP_BYTES = 46
+
+class HabitLogBitmap(Base):
+    __tablename__ = "habit_log_bitmaps"
+    __table_args__ = (
+        UniqueConstraint("habit_id", "year", name="uq_habit_log_bitmaps_habit_year"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), nullable=False)
+    year = Column(Integer, nullable=False)
+    bits = Column(LargeBinary(BITMAP_BYTES), nullable=False)  # bit N = day-of-year N+1, LSB first
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    habit = relationship("Habit", back_populates="log_bitmaps")
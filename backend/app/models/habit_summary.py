@@ -1,15 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
 class HabitSummary(Base):
     __tablename__ = "habit_summary"
+    __table_args__ = (
+        UniqueConstraint("user_id", "habit_id", "summary_date", name="uq_habit_summary_user_habit_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), nullable=False)
-    summary_date = Column(DateTime(timezone=True), nullable=False)  # Date for which the summary is calculated
+    summary_date = Column(DateTime(timezone=True), nullable=False)  # Midnight UTC of the day the summary is calculated for
     completion_rate = Column(Float, default=0.0)
     consistency_score = Column(Float, default=0.0)
     current_streak = Column(Integer, default=0)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.database import Base
+
+# A maximal run of consecutive completed days for a habit
+class HabitStreakRun(Base):
+    __tablename__ = "habit_streak_runs"
+    __table_args__ = (
+        UniqueConstraint("habit_id", "start_day", name="uq_habit_streak_runs_habit_start"),
+        Index("ix_habit_streak_runs_habit_end", "habit_id", "end_day"),
+        Index("ix_habit_streak_runs_habit_length", "habit_id", "length"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    habit_id = Column(Integer, ForeignKey("habits.id", ondelete="CASCADE"), nullable=False)
+    start_day = Column(Date, nullable=False)
+    end_day = Column(Date, nullable=False)
+    length = Column(Integer, nullable=False)  # end_day - start_day + 1, kept for indexed MAX()
+
+    habit = relationship("Habit", back_populates="streak_runs")
@@ -13,6 +13,8 @@ class User(Base):
     profile_photo_url = Column(String(511), nullable=True)
     is_active = Column(Boolean, default=True)
     rest_tokens_available = Column(Integer, default=0)
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on every change to the user's habits or logs
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped to revoke issued tokens
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
@@ -1,17 +1,17 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from app.database import SessionLocal
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, User as UserSchema, Token
-from app.auth import get_password_hash, authenticate_user, create_access_token, get_current_user
+from app.auth import authenticate_user, create_user_token, get_current_db_user, run_hasher_async
+from app.services.passwords import hash_password
 from app.config import settings
 
 router = APIRouter(prefix="", tags=["authentication"])
 
-@router.post("/register", response_model=UserSchema)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    """Register a new user"""
+def _create_user(user: UserCreate, hashed_password: str) -> User:
+    db = SessionLocal()
     try:
         # Check if user already exists
         db_user = db.query(User).filter(User.email == user.email).first()
@@ -22,7 +22,6 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             )
         
         # Create new user
-        hashed_password = get_password_hash(user.password)
         db_user = User(
             email=user.email,
             hashed_password=hashed_password,
@@ -42,11 +41,19 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
         )
+    finally:
+        db.close()
+
+@router.post("/register", response_model=UserSchema)
+async def register_user(user: UserCreate):
+    """Register a new user. The password is hashed on the hasher pool before a database session is opened."""
+    hashed_password = await run_hasher_async(hash_password, user.password)
+    return await run_in_threadpool(_create_user, user, hashed_password)
 
 @router.post("/login", response_model=Token)
-def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login_user(user_credentials: UserLogin):
     """Authenticate user and return access token"""
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await authenticate_user(user_credentials.email, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -55,13 +62,11 @@ def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
         )
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user, expires_delta=access_token_expires)
     
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/users/me", response_model=UserSchema)
-def read_users_me(current_user: User = Depends(get_current_user)):
+def read_users_me(current_user: User = Depends(get_current_db_user)):
     """Retrieve current authenticated user"""
     return current_user
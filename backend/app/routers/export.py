@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.database import ReadSessionLocal
+from app.auth import Principal, get_current_user
+from app.services.export import export_records, encode_csv, encode_ndjson, chunked
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@router.get("/")
+def export_history(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = Query(False, description="Compress the export with gzip"),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Stream all of the current user's habits, logs and summaries as NDJSON or CSV"""
+    user_id = current_user.id
+    encode = encode_csv if format == "csv" else encode_ndjson
+
+    def body():
+        # The export outlives the request's session, so it reads through its own
+        db = ReadSessionLocal()
+        try:
+            yield from chunked(encode(export_records(db, user_id)), gzip=gzip)
+        finally:
+            db.close()
+
+    filename = f"habitflow-export.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,68 +1,52 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import base64
+import csv
+import gzip
+import io
+import logging
+from collections import defaultdict
+from dataclasses import asdict
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile, status
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, extract
-from datetime import datetime, timedelta, timezone
-from app.database import get_db
-from app.models.user import User
+from sqlalchemy import and_, or_, update
+from datetime import date, datetime, timedelta, timezone
+from app.database import async_endpoint, get_db, get_read_db, insert_ignore
 from app.models.habit import Habit, HabitLog
-from app.models.habit_summary import HabitSummary
-from app.schemas.habit import HabitCreate, HabitUpdate, Habit as HabitSchema, HabitLogCreate, HabitLog as HabitLogSchema
-from app.auth import get_current_user
-from app.services.consistency import calculate_7_day_consistency, get_local_today, check_and_award_rest_tokens, calculate_current_streak
+from app.schemas.habit import HabitCreate, HabitUpdate, Habit as HabitSchema, HabitLogCreate, HabitLog as HabitLogSchema, HabitLogBulkRequest, HabitLogBulkResult, HabitLogImportResult, HabitCalendar
+from app.auth import Principal, get_current_user
+from app.services.consistency import apply_fresh_stats, refresh_habit_stats, check_and_award_rest_tokens, get_local_today
+from app.services.data_version import bump_data_version
+from app.services.rollups import refresh_daily_rollups
+from app.services.summary_queue import summary_queue
+from app.services.importer import import_logs, parse_records
+from app.services.idempotency import claim_key, request_hash, store_response
+from app.services.log_indexes import sync_log_day, sync_log_days
+from app.services.calendar_matrix import completion_bits, encode_bits
+
+logger = logging.getLogger(__name__)
+
+MAX_CALENDAR_DAYS = 366
 
 router = APIRouter(prefix="/habits", tags=["habits"])
 
 @router.get("/", response_model=List[HabitSchema])
+@async_endpoint
 def get_habits(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all habits for the current user"""
+    """Get all habits for the current user (read-only; stale stats are recomputed in memory)"""
     habits = db.query(Habit).filter(
         and_(Habit.user_id == current_user.id, Habit.is_active == True)
     ).order_by(Habit.created_at.desc()).all()
     
-    today = get_local_today()
-    days_since_monday = today.weekday()
-    monday = today - timedelta(days=days_since_monday)
-    
-    for habit in habits:
-        current_week = [False] * 7
-        
-        for i in range(7):
-            check_date = monday + timedelta(days=i)
-            if check_date <= today:
-                log_exists = db.query(HabitLog).filter(
-                    HabitLog.habit_id == habit.id,
-                    HabitLog.user_id == current_user.id,
-                    func.date(HabitLog.completed_date) == check_date
-                ).first()
-                
-                current_week[i] = log_exists is not None
-        
-        habit.currentWeek = current_week
-        
-        # Calculate and update 7-day consistency and streak
-        consistency_score = calculate_7_day_consistency(db, habit.id, current_user.id)
-        streak = calculate_current_streak(db, habit.id, current_user.id)
-        
-        habit.consistency_score = consistency_score
-        habit.streak = streak
-        
-        db.query(Habit).filter(Habit.id == habit.id).update({
-            "consistency_score": consistency_score,
-            "currentWeek": current_week,
-            "streak": streak
-        })
-    
-    db.commit()
-    return habits
+    return apply_fresh_stats(db, current_user.id, habits)
 
 @router.post("/", response_model=HabitSchema)
+@async_endpoint
 def create_habit(
     habit: HabitCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new habit"""
@@ -73,16 +57,64 @@ def create_habit(
         streak=0
     )
     db.add(db_habit)
+    db.flush()
+    refresh_daily_rollups(db, current_user.id, [get_local_today()])
+    bump_data_version(db, current_user.id)
     db.commit()
     db.refresh(db_habit)
     
     return db_habit
 
+@router.get("/calendar", response_model=HabitCalendar)
+@async_endpoint
+def get_habit_calendar(
+    from_date: Optional[date] = Query(None, alias="from", description="First day; Monday of the current week by default"),
+    to_date: Optional[date] = Query(None, alias="to", description="Last day; six days after from by default"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """
+    Get which days each active habit was completed on, for any range of up to a year.
+    Each habit's days are returned as a base64 bitset, read with one range query over the logs.
+    """
+    if from_date is None:
+        today = get_local_today()
+        from_date = today - timedelta(days=today.weekday())
+    if to_date is None:
+        to_date = from_date + timedelta(days=6)
+    days = (to_date - from_date).days + 1
+    if days < 1 or days > MAX_CALENDAR_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"to must be on or after from and at most {MAX_CALENDAR_DAYS} days later"
+        )
+
+    habits = db.query(Habit.id, Habit.name, Habit.icon).filter(
+        and_(Habit.user_id == current_user.id, Habit.is_active == True)
+    ).order_by(Habit.created_at.desc()).all()
+    bits = completion_bits(db, current_user.id, [habit.id for habit in habits], from_date, to_date)
+    return {
+        "start": from_date,
+        "end": to_date,
+        "days": days,
+        "habits": [
+            {
+                "habit_id": habit.id,
+                "name": habit.name,
+                "icon": habit.icon or "🎯",
+                "completed": bits[habit.id].bit_count(),
+                "bits": encode_bits(bits[habit.id], days)
+            }
+            for habit in habits
+        ]
+    }
+
 @router.get("/{habit_id}", response_model=HabitSchema)
+@async_endpoint
 def get_habit(
     habit_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
     """Get a specific habit"""
     habit = db.query(Habit).filter(
@@ -95,17 +127,16 @@ def get_habit(
             detail="Habit not found"
         )
     
-    # Calculate consistency and streak
-    habit.consistency_score = calculate_7_day_consistency(db, habit.id, current_user.id)
-    habit.streak = calculate_current_streak(db, habit.id, current_user.id)
+    apply_fresh_stats(db, current_user.id, [habit])
     
     return habit
 
 @router.put("/{habit_id}", response_model=HabitSchema)
+@async_endpoint
 def update_habit(
     habit_id: int,
     habit_update: HabitUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update a habit"""
@@ -123,6 +154,7 @@ def update_habit(
     update_data = habit_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(habit, field, value)
+    bump_data_version(db, current_user.id)
     
     db.commit()
     db.refresh(habit)
@@ -130,9 +162,10 @@ def update_habit(
     return habit
 
 @router.delete("/{habit_id}")
+@async_endpoint
 def delete_habit(
     habit_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a habit (soft delete by setting is_active to False)"""
@@ -147,16 +180,21 @@ def delete_habit(
         )
     
     habit.is_active = False
+    db.flush()
+    refresh_daily_rollups(db, current_user.id, [get_local_today()])
+    bump_data_version(db, current_user.id)
     db.commit()
     
     return {"message": "Habit deleted successfully"}
 
 @router.post("/{habit_id}/logs", response_model=HabitLogSchema)
+@async_endpoint
 def log_habit_completion(
     habit_id: int,
     habit_log: HabitLogCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
 ):
     """Log a habit completion or update existing log"""
     # Verify habit belongs to user
@@ -169,100 +207,230 @@ def log_habit_completion(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Habit not found"
         )
-    
-    # Check if already logged for this date
-    existing_log = db.query(HabitLog).filter(
-        and_(
-            HabitLog.habit_id == habit_id,
-            HabitLog.user_id == current_user.id,
-            func.date(HabitLog.completed_date) == func.date(habit_log.completed_date)
+
+    if idempotency_key:
+        replay = claim_key(
+            db, current_user.id, idempotency_key,
+            request_hash("POST", f"/habits/{habit_id}/logs", habit_log.model_dump(mode="json"))
         )
-    ).first()
-    
-    if existing_log:
-        # Update existing log instead of raising error
-        if habit_log.notes:
-            existing_log.notes = habit_log.notes
-        db.commit()
-        db.refresh(existing_log)
-        update_habit_summary(db, current_user.id, habit_id, habit_log.completed_date.date())
-        return existing_log
-    
-    # Create new log
-    db_log = HabitLog(
-        **habit_log.dict(),
-        user_id=current_user.id
+        if replay is not None:
+            return replay
+
+    # Insert unless the day is already logged; the unique key makes concurrent double-taps safe
+    completed_day = habit_log.completed_date.date()
+    created = db.execute(
+        insert_ignore(db, HabitLog, ["user_id", "habit_id", "completed_day"]).values(
+            user_id=current_user.id,
+            habit_id=habit_id,
+            completed_date=habit_log.completed_date,
+            completed_day=completed_day,
+            notes=habit_log.notes,
+            used_rest_token=habit_log.used_rest_token or False
+        )
+    ).rowcount == 1
+
+    log_key = and_(
+        HabitLog.user_id == current_user.id,
+        HabitLog.habit_id == habit_id,
+        HabitLog.completed_day == completed_day
     )
-    db.add(db_log)
+    if created:
+        # Refresh indexes and stats, and award tokens in the same transaction
+        sync_log_day(db, current_user.id, habit_id, completed_day)
+        habit_stats = refresh_habit_stats(db, current_user.id, [habit_id])[habit_id]
+        check_and_award_rest_tokens(db, current_user.id, habit_id, streak=habit_stats.streak)
+    elif habit_log.notes:
+        # Update existing log instead of raising error; the day's stats are unchanged
+        db.query(HabitLog).filter(log_key).update({"notes": habit_log.notes}, synchronize_session=False)
+
+    # Locking read: a plain SELECT reads the REPEATABLE READ snapshot taken before a concurrent
+    # request committed the row our insert was ignored for
+    db_log = db.query(HabitLog).filter(log_key).with_for_update().one()
+    if idempotency_key:
+        store_response(
+            db, current_user.id, idempotency_key, status.HTTP_200_OK,
+            HabitLogSchema.model_validate(db_log).model_dump(mode="json")
+        )
     db.commit()
-    db.refresh(db_log)
-    update_habit_summary(db, current_user.id, habit_id, habit_log.completed_date.date())
-    check_and_award_rest_tokens(db, current_user.id, habit_id)
+    if created:
+        summary_queue.enqueue(current_user.id, habit_id, [completed_day])
     return db_log
 
-def update_habit_summary(db: Session, user_id: int, habit_id: int, summary_date: datetime.date):
-    # Get all logs for the habit
-    all_logs = db.query(HabitLog).filter(
-        and_(
-            HabitLog.user_id == user_id,
-            HabitLog.habit_id == habit_id
+@router.post("/logs/bulk", response_model=HabitLogBulkResult)
+@async_endpoint
+def bulk_log_habits(
+    request: HabitLogBulkRequest,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
+    """Log or remove completions across many habits and days in one transaction"""
+    if idempotency_key:
+        replay = claim_key(
+            db, current_user.id, idempotency_key,
+            request_hash("POST", "/habits/logs/bulk", request.model_dump(mode="json"))
         )
-    ).order_by(HabitLog.completed_date).all()
+        if replay is not None:
+            return replay
 
-    if not all_logs:
-        return
+    # The last operation for a habit and day wins
+    operations = {}
+    for operation in request.operations:
+        operations[(operation.habit_id, operation.completed_date.date())] = operation
 
-    total_completions = len(all_logs)
+    habit_ids = {habit_id for habit_id, _ in operations}
+    habits = db.query(Habit).filter(
+        and_(Habit.user_id == current_user.id, Habit.id.in_(habit_ids))
+    ).all()
+    missing = habit_ids - {habit.id for habit in habits}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Habit not found: {', '.join(str(habit_id) for habit_id in sorted(missing))}"
+        )
 
-    # Calculate 7-day rolling consistency score and streaks
-    consistency_score = calculate_7_day_consistency(db, habit_id, user_id)
-    current_streak = calculate_current_streak(db, habit_id, user_id)
-    longest_streak = calculate_longest_streak(db, habit_id, user_id)
-    
-    # Use consistency_score as completion_rate for the daily summary
-    completion_rate = consistency_score
+    existing = {
+        (habit_id, completed_day): log_id
+        for log_id, habit_id, completed_day in db.query(HabitLog.id, HabitLog.habit_id, HabitLog.completed_day).filter(
+            HabitLog.user_id == current_user.id,
+            HabitLog.habit_id.in_(habit_ids),
+            HabitLog.completed_day.in_({day for _, day in operations})
+        )
+    }
 
-    db.query(Habit).filter(Habit.id == habit_id).update({
-        "consistency_score": consistency_score,
-        "streak": current_streak
-    })
+    to_insert, to_update, to_delete = [], [], []
+    added_days, changed_days = defaultdict(set), defaultdict(set)
+    for (habit_id, day), operation in operations.items():
+        log_id = existing.get((habit_id, day))
+        if operation.remove:
+            if log_id is not None:
+                to_delete.append(log_id)
+                changed_days[habit_id].add(day)
+        elif log_id is None:
+            to_insert.append({
+                "user_id": current_user.id,
+                "habit_id": habit_id,
+                "completed_date": operation.completed_date,
+                "completed_day": day,
+                "notes": operation.notes,
+                "used_rest_token": False
+            })
+            added_days[habit_id].add(day)
+            changed_days[habit_id].add(day)
+        elif operation.notes:
+            to_update.append({"id": log_id, "notes": operation.notes})
 
-    # Use func.date for comparison to avoid time issues
-    existing_summary = db.query(HabitSummary).filter(
-        and_(
-            HabitSummary.user_id == user_id,
-            HabitSummary.habit_id == habit_id,
-            func.date(HabitSummary.summary_date) == summary_date
+    created = 0
+    if to_insert:
+        # A log written concurrently for the same day is kept; sync_log_days reads back what is stored.
+        # One multi-row statement, so rowcount counts only the rows actually inserted
+        created = db.execute(
+            insert_ignore(db, HabitLog, ["user_id", "habit_id", "completed_day"]).values(to_insert)
+        ).rowcount
+    if to_update:
+        db.execute(update(HabitLog), to_update)
+    if to_delete:
+        db.query(HabitLog).filter(HabitLog.id.in_(to_delete)).delete(synchronize_session=False)
+
+    # Recompute indexes and stats once per affected habit
+    for habit_id, days in changed_days.items():
+        sync_log_days(db, current_user.id, habit_id, days)
+    stats = refresh_habit_stats(db, current_user.id, changed_days.keys())
+    for habit_id in changed_days:
+        if added_days[habit_id]:
+            check_and_award_rest_tokens(db, current_user.id, habit_id, streak=stats[habit_id].streak)
+
+    # Reload the habits in one query to pick up their refreshed stats
+    habits = db.query(Habit).populate_existing().filter(
+        Habit.id.in_(habit_ids)
+    ).order_by(Habit.created_at.desc()).all()
+    result = {
+        "created": created,
+        "updated": len(to_update),
+        "removed": len(to_delete),
+        "habits": apply_fresh_stats(db, current_user.id, habits)
+    }
+    if idempotency_key:
+        store_response(
+            db, current_user.id, idempotency_key, status.HTTP_200_OK,
+            HabitLogBulkResult.model_validate(result).model_dump(mode="json")
         )
-    ).first()
+    db.commit()
+    for habit_id, days in changed_days.items():
+        summary_queue.enqueue(current_user.id, habit_id, [max(days)])
+    return result
 
-    if existing_summary:
-        existing_summary.consistency_score = consistency_score
-        existing_summary.completion_rate = completion_rate
-        existing_summary.current_streak = current_streak
-        existing_summary.longest_streak = longest_streak
-        existing_summary.total_completions = total_completions
-    else:
-        new_summary = HabitSummary(
-            user_id=user_id,
-            habit_id=habit_id,
-            summary_date=datetime.combine(summary_date, datetime.min.time(), tzinfo=timezone.utc),
-            consistency_score=consistency_score,
-            completion_rate=completion_rate,
-            current_streak=current_streak,
-            longest_streak=longest_streak,
-            total_completions=total_completions
+# Stays on the sync engine in async mode: parsing and rebuilding indexes would otherwise run
+# inside run_sync on the event loop for the whole import
+@router.post("/logs/import", response_model=HabitLogImportResult)
+def import_habit_logs(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Import logs from a CSV or NDJSON file (optionally gzipped), skipping days that are already logged"""
+    filename = (file.filename or "").lower()
+    stream = file.file
+    if filename.endswith(".gz"):
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+        filename = filename[:-3]
+    format = format or ("csv" if filename.endswith(".csv") else "ndjson")
+
+    def report(result):
+        logger.info(f"Import for user {current_user.id}: {result.rows} rows, {result.inserted} inserted, {result.rows_per_second:.0f} rows/s")
+
+    lines = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        result = import_logs(db, current_user.id, parse_records(lines, format), progress=report)
+    except (UnicodeDecodeError, OSError, csv.Error) as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Could not read import file: {e}"
         )
-        db.add(new_summary)
     db.commit()
+    return {**asdict(result), "rows_per_second": result.rows_per_second}
+
+def _encode_log_cursor(log: HabitLog) -> str:
+    raw = f"{log.completed_date.isoformat()}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def _decode_log_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        completed_date, log_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(completed_date), int(log_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 @router.get("/{habit_id}/logs", response_model=List[HabitLogSchema])
+@async_endpoint
 def get_habit_logs(
     habit_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    before: Optional[str] = Query(None, description="Cursor: return logs older than this one"),
+    after: Optional[str] = Query(None, description="Cursor: return logs newer than this one"),
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
 ):
-    """Get all logs for a specific habit"""
+    """
+    Get a page of logs for a specific habit, newest first.
+    Cursors for the neighbouring pages are returned in the X-Next-Cursor (older)
+    and X-Prev-Cursor (newer) headers.
+    """
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either before or after, not both"
+        )
+
     # Verify habit belongs to user
     habit = db.query(Habit).filter(
         and_(Habit.id == habit_id, Habit.user_id == current_user.id)
@@ -274,21 +442,50 @@ def get_habit_logs(
             detail="Habit not found"
         )
     
-    logs = db.query(HabitLog).filter(
+    query = db.query(HabitLog).filter(
         and_(HabitLog.habit_id == habit_id, HabitLog.user_id == current_user.id)
-    ).order_by(HabitLog.completed_date.desc()).all()
-    
+    )
+    if from_date:
+        query = query.filter(HabitLog.completed_date >= datetime.combine(from_date, datetime.min.time(), tzinfo=timezone.utc))
+    if to_date:
+        query = query.filter(HabitLog.completed_date < datetime.combine(to_date + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc))
+
+    # Keyset pagination on (completed_date, id); one extra row tells whether another page exists
+    if after:
+        completed_date, log_id = _decode_log_cursor(after)
+        logs = query.filter(or_(
+            HabitLog.completed_date > completed_date,
+            and_(HabitLog.completed_date == completed_date, HabitLog.id > log_id)
+        )).order_by(HabitLog.completed_date.asc(), HabitLog.id.asc()).limit(limit + 1).all()
+        has_newer, has_older = len(logs) > limit, True
+        logs = logs[:limit][::-1]
+    else:
+        if before:
+            completed_date, log_id = _decode_log_cursor(before)
+            query = query.filter(or_(
+                HabitLog.completed_date < completed_date,
+                and_(HabitLog.completed_date == completed_date, HabitLog.id < log_id)
+            ))
+        logs = query.order_by(HabitLog.completed_date.desc(), HabitLog.id.desc()).limit(limit + 1).all()
+        has_newer, has_older = bool(before), len(logs) > limit
+        logs = logs[:limit]
+
+    if logs and has_older:
+        response.headers["X-Next-Cursor"] = _encode_log_cursor(logs[-1])
+    if logs and has_newer:
+        response.headers["X-Prev-Cursor"] = _encode_log_cursor(logs[0])
     return logs
 
 
-@router.delete("/{habit_id}/logs/{log_id}")
-def delete_habit_log(
+@router.delete("/{habit_id}/logs/by-date")
+@async_endpoint
+def delete_habit_log_by_date(
     habit_id: int,
-    log_id: int,
-    current_user: User = Depends(get_current_user),
+    completed_date: str,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a specific habit log by ID"""
+    """Delete a habit log by date (for toggle functionality)"""
     # Verify habit belongs to user
     habit = db.query(Habit).filter(
         and_(Habit.id == habit_id, Habit.user_id == current_user.id)
@@ -300,38 +497,48 @@ def delete_habit_log(
             detail="Habit not found"
         )
 
-    # Verify log belongs to user and habit
+    # Parse the date
+    try:
+        log_date = datetime.fromisoformat(completed_date.replace('Z', '+00:00')).date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format"
+        )
+
+    # Find and delete log for this date
     log = db.query(HabitLog).filter(
         and_(
-            HabitLog.id == log_id,
             HabitLog.habit_id == habit_id,
-            HabitLog.user_id == current_user.id
+            HabitLog.user_id == current_user.id,
+            HabitLog.completed_day == log_date
         )
     ).first()
 
     if not log:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Habit log not found"
+            detail="No log found for this date"
         )
 
-    log_date = log.completed_date.date()
     db.delete(log)
+    sync_log_day(db, current_user.id, habit_id, log_date)
+    refresh_habit_stats(db, current_user.id, [habit_id])
     db.commit()
-
-    # Update habit summary after log deletion
-    update_habit_summary(db, current_user.id, habit_id, log_date)
+    # The habit summary is recomputed in the background
+    summary_queue.enqueue(current_user.id, habit_id, [log_date])
 
     return {"message": "Habit log deleted successfully"}
 
-@router.delete("/{habit_id}/logs/by-date")
-def delete_habit_log_by_date(
+@router.delete("/{habit_id}/logs/{log_id}")
+@async_endpoint
+def delete_habit_log(
     habit_id: int,
-    completed_date: str,
-    current_user: User = Depends(get_current_user),
+    log_id: int,
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Delete a habit log by date (for toggle functionality)"""
+    """Delete a specific habit log by ID"""
     # Verify habit belongs to user
     habit = db.query(Habit).filter(
         and_(Habit.id == habit_id, Habit.user_id == current_user.id)
@@ -343,34 +550,27 @@ def delete_habit_log_by_date(
             detail="Habit not found"
         )
 
-    # Parse the date
-    try:
-        log_date = datetime.fromisoformat(completed_date.replace('Z', '+00:00')).date()
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid date format"
-        )
-
-    # Find and delete log for this date
+    # Verify log belongs to user and habit
     log = db.query(HabitLog).filter(
         and_(
+            HabitLog.id == log_id,
             HabitLog.habit_id == habit_id,
-            HabitLog.user_id == current_user.id,
-            func.date(HabitLog.completed_date) == log_date
+            HabitLog.user_id == current_user.id
         )
     ).first()
 
     if not log:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="No log found for this date"
+            detail="Habit log not found"
         )
 
+    log_date = log.completed_day
     db.delete(log)
+    sync_log_day(db, current_user.id, habit_id, log_date)
+    refresh_habit_stats(db, current_user.id, [habit_id])
     db.commit()
-
-    # Update habit summary after log deletion
-    update_habit_summary(db, current_user.id, habit_id, log_date)
+    # The habit summary is recomputed in the background
+    summary_queue.enqueue(current_user.id, habit_id, [log_date])
 
     return {"message": "Habit log deleted successfully"}
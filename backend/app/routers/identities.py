@@ -3,16 +3,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.database import get_db
-from app.models.user import User
 from app.models.identity import Identity
 from app.schemas.identity import IdentityCreate, IdentityUpdate, Identity as IdentitySchema
-from app.auth import get_current_user
+from app.auth import Principal, get_current_user
 
 router = APIRouter(prefix="/identities", tags=["identities"])
 
 @router.get("/", response_model=List[IdentitySchema])
 def get_identities(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all identities for the current user"""
@@ -22,7 +21,7 @@ def get_identities(
 @router.post("/", response_model=IdentitySchema)
 def create_identity(
     identity: IdentityCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Create a new identity"""
@@ -38,7 +37,7 @@ def create_identity(
 @router.get("/{identity_id}", response_model=IdentitySchema)
 def get_identity(
     identity_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get a specific identity"""
@@ -57,7 +56,7 @@ def get_identity(
 def update_identity(
     identity_id: int,
     identity_update: IdentityUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Update an identity"""
@@ -82,7 +81,7 @@ def update_identity(
 @router.delete("/{identity_id}")
 def delete_identity(
     identity_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete an identity"""
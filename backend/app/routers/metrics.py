@@ -0,0 +1,43 @@
+import hmac
+from typing import Optional
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from app.auth import principal_cache
+from app.cache import summary_cache
+from app.config import settings
+from app.database import pool_stats
+from app.services.passwords import password_hasher
+
+metrics_bearer = HTTPBearer(auto_error=False)
+
+async def require_metrics_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(metrics_bearer)):
+    """Operator credential for /metrics; user tokens are not accepted"""
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if credentials is None or not hmac.compare_digest(credentials.credentials.encode(), settings.metrics_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(require_metrics_token)])
+
+@router.get("/")
+async def get_metrics():
+    """Process-local counters for the caches, connection pools and request threads"""
+    # Async so that reading the thread limiter does not itself borrow a thread
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "caches": {
+            summary_cache.name: summary_cache.stats(),
+            "principal": principal_cache.stats()
+        },
+        "password_hasher": password_hasher.stats(),
+        "pools": pool_stats(),
+        "threadpool": {
+            "total_tokens": limiter.total_tokens,
+            "borrowed_tokens": limiter.borrowed_tokens
+        }
+    }
@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import base64
+import hashlib
+from types import SimpleNamespace
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import date, timedelta, datetime
-from sqlalchemy import func, and_
+from datetime import date, timedelta, datetime, timezone
+from sqlalchemy import func, and_, select
 
-from app.database import get_db
-from app.models.user import User
+from app.cache import summary_cache
+from app.database import async_endpoint, get_db, upsert
 from app.models.habit import Habit, HabitLog
 from app.models.habit_summary import HabitSummary
+from app.models.daily_rollup import UserDailyRollup
+from app.models.streak_run import HabitStreakRun
 from app.schemas.habit_summary import HabitSummarySchema, HabitSummaryCreate
-from app.auth import get_current_user
-from app.services.consistency import calculate_current_streak, calculate_longest_streak
+from app.auth import Principal, get_current_user
+from app.services.consistency import compute_habit_stats, get_local_today
+from app.services.data_version import bump_data_version, get_data_version
+from app.services.series import bucket_start, completion_series, daily_counts, fold_series
+
+MAX_SERIES_DAYS = 366 * 20
 
 router = APIRouter(
     prefix="/summary",
@@ -19,10 +28,11 @@ router = APIRouter(
 )
 
 @router.get("/", response_model=List[HabitSummarySchema])
+@async_endpoint
 def get_habit_summaries(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get habit summaries for the current user, optionally filtered by date range"""
@@ -36,151 +46,363 @@ def get_habit_summaries(
     return query.all()
 
 @router.post("/", response_model=HabitSummarySchema)
+@async_endpoint
 def create_habit_summary(
     summary: HabitSummaryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Create a new habit summary entry"""
-    db_summary = HabitSummary(
+    """Create a habit summary entry, replacing any existing one for the same habit and day"""
+    values = {
         **summary.dict(),
-        user_id=current_user.id
-    )
-    db.add(db_summary)
+        "user_id": current_user.id,
+        "summary_date": datetime.combine(summary.summary_date, datetime.min.time(), tzinfo=timezone.utc)
+    }
+    db.execute(upsert(
+        db,
+        HabitSummary,
+        ["user_id", "habit_id", "summary_date"],
+        values,
+        update_columns=["completion_rate", "current_streak", "longest_streak", "total_completions"]
+    ))
+    bump_data_version(db, current_user.id)
     db.commit()
-    db.refresh(db_summary)
-    return db_summary
+    return db.query(HabitSummary).filter(
+        HabitSummary.user_id == current_user.id,
+        HabitSummary.habit_id == summary.habit_id,
+        HabitSummary.summary_date == values["summary_date"]
+    ).one()
+
+def _cached(db: Session, current_user: Principal, endpoint: str, params, compute, version: Optional[int] = None):
+    """The endpoint's result from the summary cache, computed on a miss. Entries follow the user's data version."""
+    if version is None:
+        version = get_data_version(db, current_user.id)
+    return summary_cache.get_or_compute(
+        endpoint, current_user.id, version, params, compute, today=get_local_today()
+    )
 
-@router.get("/overall")
-def get_overall_summary(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get overall summary data for the current user"""
-    habits = db.query(Habit).filter(Habit.user_id == current_user.id).all()
+def _habit_stats_query(db: Session, user_id: int):
+    """The user's habits with longest streak and total completions from indexed subqueries, in one query."""
+    longest_streak = select(func.max(HabitStreakRun.length)).where(
+        HabitStreakRun.habit_id == Habit.id
+    ).correlate(Habit).scalar_subquery()
+    total_completions = select(func.count(HabitLog.id)).where(
+        HabitLog.user_id == Habit.user_id,
+        HabitLog.habit_id == Habit.id
+    ).correlate(Habit).scalar_subquery()
+    query = db.query(
+        Habit.id, Habit.name, Habit.is_active, Habit.streak, Habit.consistency_score, Habit.stats_date,
+        func.coalesce(longest_streak, Habit.streak).label("longest_streak"),
+        total_completions.label("total_completions")
+    ).filter(Habit.user_id == user_id)
+    return query, longest_streak, total_completions
+
+def _with_fresh_stats(db: Session, user_id: int, rows, today: Optional[date] = None) -> list:
+    """
+    Rows of _habit_stats_query carrying today's streak and consistency. Rows whose stored
+    stats predate today are recomputed, without writing, as GET /habits does.
+    """
+    today = today or get_local_today()
+    stale = [row.id for row in rows if row.stats_date != today]
+    stats = compute_habit_stats(db, user_id, stale, today) if stale else {}
+    habits = []
+    for row in rows:
+        values = row._asdict()
+        if row.id in stats:
+            values["streak"] = stats[row.id].streak
+            values["consistency_score"] = stats[row.id].consistency_score
+            values["longest_streak"] = max(values["longest_streak"] or 0, values["streak"])
+        habits.append(SimpleNamespace(**values))
+    return habits
+
+def _overall(habits) -> dict:
     total_habits = len(habits)
     active_habits = len([h for h in habits if h.is_active])
 
     # Calculate overall completion rate
-    total_consistency = sum([h.consistency_score for h in habits])
+    total_consistency = sum([h.consistency_score or 0 for h in habits])
     overall_completion_rate = total_consistency / total_habits if total_habits > 0 else 0
 
-    # Best streak is the max of all current streaks
-    current_streak = max([h.streak for h in habits]) if habits else 0
-    
-    # Longest streak ever across all habits
-    longest_streak_overall = db.query(func.max(HabitSummary.longest_streak)).filter(
-        HabitSummary.user_id == current_user.id
-    ).scalar() or 0
-
-    # Total completions across all habits
-    total_completions = db.query(func.sum(HabitSummary.total_completions)).filter(
-        HabitSummary.user_id == current_user.id
-    ).scalar() or 0
-
-    overall_summary = {
+    return {
         "total_habits": total_habits,
         "active_habits": active_habits,
         "overall_completion_rate": round(overall_completion_rate, 2),
-        "current_streak": current_streak,
-        "longest_streak": longest_streak_overall,
-        "total_completions": int(total_completions)
+        # Best streak is the max of all current streaks
+        "current_streak": max([h.streak or 0 for h in habits]) if habits else 0,
+        # Longest streak ever across all habits
+        "longest_streak": max([h.longest_streak or 0 for h in habits]) if habits else 0,
+        # Total completions across all habits
+        "total_completions": sum([h.total_completions for h in habits])
     }
-    return overall_summary
+
+def _top_habit(habit) -> dict:
+    return {
+        "habit_id": str(habit.id),
+        "habit_name": habit.name,
+        "current_streak": habit.streak,
+        "longest_streak": habit.longest_streak,
+        "total_completions": habit.total_completions,
+        "completion_rate": habit.consistency_score
+    }
+
+def _daily_completions(daily, start_date: date, end_date: date) -> List[dict]:
+    return [
+        {
+            "date": (start_date + timedelta(days=offset)).isoformat(),
+            "count": daily.get(start_date + timedelta(days=offset), (0,))[0]
+        }
+        for offset in range((end_date - start_date).days + 1)
+    ]
+
+@router.get("/overall")
+@async_endpoint
+def get_overall_summary(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get overall summary data for the current user"""
+    return _cached(db, current_user, "overall", None, lambda: _overall(
+        _with_fresh_stats(db, current_user.id, _habit_stats_query(db, current_user.id)[0].all())
+    ))
 
 
 @router.get("/weekly")
+@async_endpoint
 def get_weekly_summary(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get weekly summary data for the current user for the past 4 weeks"""
-    weekly_summaries = []
-    today = datetime.now().date()
-
-    for i in range(4):
-        end_date = today - timedelta(weeks=i)
-        start_date = end_date - timedelta(days=6) # Start of the week
+    return _cached(db, current_user, "weekly", None, lambda: _weekly(db, current_user.id))
 
-        summaries_in_week = db.query(HabitSummary).filter(
-            and_(
-                HabitSummary.user_id == current_user.id,
-                HabitSummary.summary_date >= start_date,
-                HabitSummary.summary_date <= end_date
-            )
-        ).all()
+def _weekly(db: Session, user_id: int) -> List[dict]:
+    today = datetime.now().date()
+    start_date = today - timedelta(days=27)
+    rollups = dict(
+        (day, (active_habits, habits_completed))
+        for day, active_habits, habits_completed in db.query(
+            UserDailyRollup.day, UserDailyRollup.active_habits, UserDailyRollup.habits_completed
+        ).filter(
+            UserDailyRollup.user_id == user_id,
+            UserDailyRollup.day >= start_date,
+            UserDailyRollup.day <= today
+        )
+    )
+    # Days without a rollup row had no logs; rate them against today's active habits
+    active_now = db.query(func.count(Habit.id)).filter(
+        Habit.user_id == user_id, Habit.is_active == True
+    ).scalar()
 
-        weekly_completion_rate = 0
-        if summaries_in_week:
-            weekly_completion_rate = sum([s.completion_rate for s in summaries_in_week]) / len(summaries_in_week)
-        
+    weekly_summaries = []
+    for week in range(4):
+        week_start = start_date + timedelta(weeks=week)
+        daily_rates = []
+        for offset in range(7):
+            active_habits, habits_completed = rollups.get(week_start + timedelta(days=offset), (active_now, 0))
+            daily_rates.append(min(habits_completed / active_habits, 1.0) * 100 if active_habits else 0.0)
         weekly_summaries.append({
-            "week_start": start_date.isoformat(),
-            "completion_rate": round(weekly_completion_rate, 2)
+            "week_start": week_start.isoformat(),
+            "completion_rate": round(sum(daily_rates) / 7, 2)
         })
-    
-    return list(reversed(weekly_summaries)) # Return in chronological order
+    return weekly_summaries # Chronological order
+
+@router.get("/series")
+@async_endpoint
+def get_completion_series(
+    bucket: str = Query("week", pattern="^(day|week|month)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    habit_id: Optional[int] = None,
+    identity_id: Optional[int] = None,
+    max_points: int = Query(120, ge=1, le=1000),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get completions and completion rate per day, week or month, optionally for one habit or identity.
+    Long ranges are downsampled to at most max_points buckets; the bucket used is returned.
+    """
+    if habit_id is not None and identity_id is not None:
+        raise HTTPException(status_code=400, detail="Filter by habit_id or identity_id, not both")
+    if end_date is None:
+        end_date = get_local_today()
+    if start_date is None:
+        start_date = end_date - {"day": timedelta(days=29), "week": timedelta(weeks=12), "month": timedelta(days=365)}[bucket]
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    if (end_date - start_date).days > MAX_SERIES_DAYS:
+        raise HTTPException(status_code=400, detail=f"Series range is limited to {MAX_SERIES_DAYS} days")
+
+    params = [bucket, start_date, end_date, habit_id, identity_id, max_points]
+    return _cached(db, current_user, "series", params, lambda: _series(db, current_user.id, *params))
+
+def _series(db: Session, user_id: int, bucket: str, start_date: date, end_date: date, habit_id, identity_id, max_points: int) -> dict:
+    effective_bucket, points = completion_series(
+        db, user_id, bucket, start_date, end_date,
+        habit_id=habit_id, identity_id=identity_id, max_points=max_points
+    )
+    return {
+        "bucket": effective_bucket,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "points": [
+            {
+                "start": point.start.isoformat(),
+                "end": point.end.isoformat(),
+                "completions": point.completions,
+                "completion_rate": point.completion_rate
+            }
+            for point in points
+        ]
+    }
 
 @router.get("/top-habits")
+@async_endpoint
 def get_top_habits(
-    current_user: User = Depends(get_current_user),
+    limit: int = Query(5, ge=1, le=50),
+    sort: str = Query("consistency", pattern="^(consistency|streak|longest_streak|total_completions)$"),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get top habits data for the current user based on consistency score"""
-    top_habits = db.query(Habit).filter(
-        and_(Habit.user_id == current_user.id, Habit.is_active == True)
-    ).order_by(Habit.consistency_score.desc()).limit(5).all()
-
-    result = []
-    for habit in top_habits:
-        # Get the latest summary for this habit to get longest_streak and total_completions
-        latest_summary = db.query(HabitSummary).filter(
-            and_(HabitSummary.user_id == current_user.id, HabitSummary.habit_id == habit.id)
-        ).order_by(HabitSummary.summary_date.desc()).first()
-        
-        result.append({
-            "habit_id": str(habit.id),
-            "habit_name": habit.name,
-            "current_streak": habit.streak,
-            "longest_streak": latest_summary.longest_streak if latest_summary else habit.streak,
-            "total_completions": latest_summary.total_completions if latest_summary else (1 if habit.streak > 0 else 0),
-            "completion_rate": habit.consistency_score
-        })
-    return result
+    """Get the user's top active habits by consistency score, streak, longest streak or total completions"""
+    return _cached(db, current_user, "top-habits", [limit, sort], lambda: _top_habits(db, current_user.id, limit, sort))
+
+def _top_habits(db: Session, user_id: int, limit: int, sort: str) -> List[dict]:
+    habits, longest_streak, total_completions = _habit_stats_query(db, user_id)
+    habits = habits.filter(Habit.is_active == True)
+    if sort in ("consistency", "streak"):
+        # Stored values may predate today, so rank on fresh ones
+        attribute = "consistency_score" if sort == "consistency" else "streak"
+        ranked = sorted(
+            _with_fresh_stats(db, user_id, habits.all()),
+            key=lambda habit: (-(getattr(habit, attribute) or 0), habit.id)
+        )
+        return [_top_habit(habit) for habit in ranked[:limit]]
+    sort_keys = {
+        "longest_streak": func.coalesce(longest_streak, Habit.streak),
+        "total_completions": total_completions
+    }
+    top_habits = habits.order_by(sort_keys[sort].desc(), Habit.id).limit(limit).all()
+    return [_top_habit(habit) for habit in _with_fresh_stats(db, user_id, top_habits)]
 
 @router.get("/daily-completions")
+@async_endpoint
 def get_daily_completions(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
 ):
-    """Get daily completions data for the current user"""
+    """Get the number of completions on each day, including days without any"""
     if start_date is None:
         start_date = datetime.now().date() - timedelta(days=30) # Last 30 days by default
     if end_date is None:
         end_date = datetime.now().date()
 
-    daily_completions_data = db.query(HabitSummary.summary_date, func.sum(HabitSummary.total_completions)).filter(
-        and_(
-            HabitSummary.user_id == current_user.id,
-            HabitSummary.summary_date >= start_date,
-            HabitSummary.summary_date <= end_date
+    def compute():
+        completions = {
+            day: (count,) for day, count in db.query(UserDailyRollup.day, UserDailyRollup.completions).filter(
+                UserDailyRollup.user_id == current_user.id,
+                UserDailyRollup.day >= start_date,
+                UserDailyRollup.day <= end_date
+            )
+        }
+        return _daily_completions(completions, start_date, end_date)
+    return _cached(db, current_user, "daily-completions", [start_date, end_date], compute)
+
+@router.get("/dashboard")
+@async_endpoint
+def get_dashboard(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get every panel of the Summary page in one request: overall stats, 12 weeks of
+    completion rates, top habits and 30 days of completions. Reads the habits and one
+    window of daily rollups, and derives all four panels from them.
+    """
+    return _cached(db, current_user, "dashboard", None, lambda: _dashboard(db, current_user.id))
+
+def _dashboard(db: Session, user_id: int) -> dict:
+    today = get_local_today()
+    daily_start = today - timedelta(days=30)
+    weekly_start = bucket_start(today - timedelta(weeks=12), "week")
+
+    habits = _with_fresh_stats(db, user_id, _habit_stats_query(db, user_id)[0].all(), today)
+    daily = {
+        day: (completions, completed, active)
+        for day, completions, completed, active in db.query(
+            UserDailyRollup.day, UserDailyRollup.completions, UserDailyRollup.habits_completed, UserDailyRollup.active_habits
+        ).filter(
+            UserDailyRollup.user_id == user_id,
+            UserDailyRollup.day >= min(daily_start, weekly_start),
+            UserDailyRollup.day <= today
         )
-    ).group_by(HabitSummary.summary_date).order_by(HabitSummary.summary_date).all()
+    }
 
-    result = []
-    for date_obj, count in daily_completions_data:
-        result.append({
-            "date": date_obj.isoformat(),
-            "count": count
-        })
-    return result
+    active = [habit for habit in habits if habit.is_active]
+    _, weeks = fold_series(daily, len(active), "week", weekly_start, today, today=today)
+    top_habits = sorted(active, key=lambda habit: (-(habit.consistency_score or 0), habit.id))[:5]
+    return {
+        "overall": _overall(habits),
+        "weekly": [{"week_start": week.start.isoformat(), "completion_rate": week.completion_rate} for week in weeks],
+        "top_habits": [_top_habit(habit) for habit in top_habits],
+        "daily_completions": _daily_completions(daily, daily_start, today)
+    }
+
+@router.get("/heatmap")
+@async_endpoint
+def get_heatmap(
+    response: Response,
+    year: Optional[int] = Query(None, ge=1970, le=9999, description="Calendar year; the last 365 days when omitted"),
+    habit_id: Optional[int] = None,
+    encoding: str = Query("json", pattern="^(json|base64)$", description="base64 packs each day into one byte, capped at 255"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the number of completions on every day of a year, for all habits or one habit.
+    The ETag follows the user's data version, so an unchanged year is answered with
+    304 Not Modified after reading only that version.
+    """
+    if year is None:
+        end_date = get_local_today()
+        start_date = end_date - timedelta(days=364)
+    else:
+        start_date, end_date = date(year, 1, 1), date(year, 12, 31)
+
+    version = get_data_version(db, current_user.id)
+    fingerprint = f"{current_user.id}|{version}|{start_date}|{end_date}|{habit_id}|{encoding}"
+    etag = f'W/"{hashlib.sha1(fingerprint.encode()).hexdigest()[:20]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if habit_id is not None and not db.query(Habit.id).filter(
+        Habit.id == habit_id, Habit.user_id == current_user.id
+    ).first():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Habit not found")
+
+    counts = _cached(
+        db, current_user, "heatmap", [start_date, end_date, habit_id],
+        lambda: daily_counts(db, current_user.id, start_date, end_date, habit_id),
+        version=version
+    )
+    response.headers.update(headers)
+    return {
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "habit_id": habit_id,
+        "encoding": encoding,
+        "counts": base64.b64encode(bytes(min(count, 255) for count in counts)).decode() if encoding == "base64" else counts
+    }
 
 @router.get("/daily", response_model=List[HabitSummarySchema])
+@async_endpoint
 def get_daily_summary(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get daily summary data for the current user for a specific date"""
@@ -199,9 +421,10 @@ def get_daily_summary(
     return daily_summaries
 
 @router.get("/habit/{habit_id}", response_model=List[HabitSummarySchema])
+@async_endpoint
 def get_habit_summary(
     habit_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get all summary data for a specific habit"""
@@ -233,7 +456,7 @@ def calculate_streak(habit_id: int, user_id: int, db: Session) -> int:
     last_completed_date = None
 
     for log in logs:
-        log_date = log.completed_date.date()
+        log_date = log.completed_day
         if last_completed_date is None:
             current_streak = 1
         elif last_completed_date - timedelta(days=1) == log_date:
@@ -250,6 +473,6 @@ def calculate_completion_rate(habit_id: int, user_id: int, start_date: date, end
     completed_days = db.query(HabitLog).filter(
         HabitLog.habit_id == habit_id,
         HabitLog.user_id == user_id,
-        HabitLog.completed_date.between(start_date, end_date)
+        HabitLog.completed_day.between(start_date, end_date)
     ).count()
     return (completed_days / total_days) * 100 if total_days > 0 else 0.0
\ No newline at end of file
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status, File, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 import os
 import shutil
 import uuid
-from app.database import get_db
-from app.schemas.user import UserCreate, User as UserSchema, UserUpdate
+from typing import Optional
+from app.database import SessionLocal, get_db
+from app.schemas.user import UserCreate, User as UserSchema, UserUpdate, PasswordChange, Token
 from app.models.user import User
-from app.auth import get_current_user
+from app.auth import Principal, create_user_token, get_current_db_user, get_current_user, invalidate_principal, run_hasher_async
+from app.services.passwords import hash_password, verify_password
 
 router = APIRouter(
     prefix="/users",
@@ -31,13 +35,13 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 @router.get("/me", response_model=UserSchema)
-def read_users_me(current_user: User = Depends(get_current_user)):
+def read_users_me(current_user: User = Depends(get_current_db_user)):
     return current_user
 
 @router.put("/me", response_model=UserSchema)
 def update_user_profile(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: Session = Depends(get_db)
 ):
     """Update current user's profile information"""
@@ -48,13 +52,54 @@ def update_user_profile(
         current_user.profile_photo_url = user_update.profile_photo_url
 
     db.commit()
+    invalidate_principal(current_user.id)
     db.refresh(current_user)
     return current_user
 
+def _load_password_hash(user_id: int) -> Optional[str]:
+    with SessionLocal() as db:
+        return db.query(User.hashed_password).filter(User.id == user_id).scalar()
+
+def _store_password(user_id: int, old_hash: str, new_hash: str) -> Optional[User]:
+    """Replace the hash and revoke older tokens, unless the password changed meanwhile"""
+    with SessionLocal() as db:
+        changed = db.query(User).filter(User.id == user_id, User.hashed_password == old_hash).update(
+            {User.hashed_password: new_hash, User.token_version: func.coalesce(User.token_version, 0) + 1},
+            synchronize_session=False
+        )
+        db.commit()
+        if not changed:
+            return None
+        user = db.query(User).filter(User.id == user_id).one()
+        db.expunge(user)
+        return user
+
+@router.put("/me/password", response_model=Token)
+async def change_password(
+    password_change: PasswordChange,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Change the current user's password, revoking every token issued before. Returns a new token.
+    No database session is held while the passwords are hashed.
+    """
+    old_hash = await run_in_threadpool(_load_password_hash, current_user.id)
+    if old_hash is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    if not await run_hasher_async(verify_password, password_change.current_password, old_hash):
+        raise HTTPException(status_code=400, detail="Current password is incorrect")
+
+    new_hash = await run_hasher_async(hash_password, password_change.new_password)
+    user = await run_in_threadpool(_store_password, current_user.id, old_hash, new_hash)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Password was changed by another request")
+    invalidate_principal(user.id)
+    return {"access_token": create_user_token(user), "token_type": "bearer"}
+
 @router.post("/me/photo", response_model=UserSchema)
 async def upload_profile_photo(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_db_user),
     db: Session = Depends(get_db)
 ):
     """Upload and set profile photo for current user"""
@@ -80,5 +125,6 @@ async def upload_profile_photo(
     current_user.profile_photo_url = photo_url
 
     db.commit()
+    invalidate_principal(current_user.id)
     db.refresh(current_user)
     return current_user
\ No newline at end of file
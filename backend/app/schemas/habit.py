@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field
+from datetime import date, datetime
 from typing import Optional, List
 
 class HabitBase(BaseModel):
@@ -56,3 +56,41 @@ class HabitLog(HabitLogBase):
     
     class Config:
         from_attributes = True
+
+class HabitLogBulkOperation(BaseModel):
+    habit_id: int
+    completed_date: datetime
+    notes: Optional[str] = None
+    remove: bool = False
+
+class HabitLogBulkRequest(BaseModel):
+    operations: List[HabitLogBulkOperation] = Field(..., min_length=1, max_length=500)
+
+class HabitLogBulkResult(BaseModel):
+    created: int
+    updated: int
+    removed: int
+    habits: List[Habit]
+
+class HabitCalendarRow(BaseModel):
+    habit_id: int
+    name: str
+    icon: str
+    completed: int
+    bits: str  # base64, little-endian: bit N set when the habit was completed on start + N days
+
+class HabitCalendar(BaseModel):
+    start: date
+    end: date
+    days: int
+    habits: List[HabitCalendarRow]
+
+class HabitLogImportResult(BaseModel):
+    rows: int
+    inserted: int
+    duplicates: int
+    failed: int
+    habits_created: int
+    seconds: float
+    rows_per_second: float
+    errors: List[str] = []
@@ -30,7 +30,13 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     email: Optional[str] = None
+    user_id: Optional[int] = None
+    token_version: Optional[int] = None
 
 class UserUpdate(BaseModel):
     name: Optional[str] = None
     profile_photo_url: Optional[str] = None
+
+class PasswordChange(BaseModel):
+    current_password: str
+    new_password: str
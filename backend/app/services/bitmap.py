@@ -0,0 +1,195 @@
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy.orm import Session
+from app.models.habit import HabitLog
+from app.models.habit_bitmap import HabitLogBitmap, BITMAP_BYTES
+
+
+def _day_bit(day: date) -> int:
+    return day.timetuple().tm_yday - 1
+
+
+class CompletionBitmap:
+    """In-memory view over one habit's yearly completion bitmaps."""
+
+    def __init__(self, years: Optional[Dict[int, int]] = None, indexed: bool = True):
+        # year -> bits packed into an int (bit N = day-of-year N+1)
+        self.years: Dict[int, int] = years or {}
+        # False when built from habit_logs because the habit has no bitmap rows yet
+        self.indexed = indexed
+
+    def set(self, day: date):
+        self.years[day.year] = self.years.get(day.year, 0) | (1 << _day_bit(day))
+
+    def clear(self, day: date):
+        if day.year in self.years:
+            self.years[day.year] &= ~(1 << _day_bit(day))
+
+    def has(self, day: date) -> bool:
+        return bool((self.years.get(day.year, 0) >> _day_bit(day)) & 1)
+
+    def _year_ranges(self, start: date, end: date):
+        year = start.year
+        while year <= end.year:
+            first = start if year == start.year else date(year, 1, 1)
+            last = end if year == end.year else date(year, 12, 31)
+            yield year, _day_bit(first), _day_bit(last)
+            year += 1
+
+    def count(self, start: date, end: date) -> int:
+        """Number of completed days in [start, end]."""
+        total = 0
+        for year, lo, hi in self._year_ranges(start, end):
+            bits = self.years.get(year, 0) >> lo
+            total += (bits & ((1 << (hi - lo + 1)) - 1)).bit_count()
+        return total
+
+    def slice(self, start: date, end: date) -> List[bool]:
+        """Completion flags for each day in [start, end]."""
+        flags: List[bool] = []
+        for year, lo, hi in self._year_ranges(start, end):
+            bits = self.years.get(year, 0)
+            flags.extend(bool((bits >> i) & 1) for i in range(lo, hi + 1))
+        return flags
+
+    def days(self) -> List[date]:
+        """All completed days in ascending order."""
+        result: List[date] = []
+        for year in sorted(self.years):
+            bits = self.years[year]
+            while bits:
+                low = bits & -bits
+                result.append(date(year, 1, 1) + timedelta(days=low.bit_length() - 1))
+                bits ^= low
+        return result
+
+    def run_ending_at(self, day: date) -> int:
+        """Length of the run of consecutive completed days ending at ``day``."""
+        length = 0
+        while self.has(day):
+            length += 1
+            day -= timedelta(days=1)
+        return length
+
+    def to_bytes(self, year: int) -> bytes:
+        return self.years.get(year, 0).to_bytes(BITMAP_BYTES, "little")
+
+
+def distinct_log_days(db: Session, habit_ids: List[int], start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Yield (habit_id, day) for every distinct day with a log."""
+    query = db.query(HabitLog.habit_id, HabitLog.completed_day).filter(HabitLog.habit_id.in_(habit_ids))
+    if start_date is not None:
+        query = query.filter(HabitLog.completed_day >= start_date)
+    if end_date is not None:
+        query = query.filter(HabitLog.completed_day <= end_date)
+    yield from query.distinct()
+
+
+def load_bitmaps(
+    db: Session,
+    habit_ids: Iterable[int],
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+) -> Dict[int, CompletionBitmap]:
+    """
+    Load completion bitmaps for the given habits and year range.
+    Habits that have no bitmap rows yet fall back to reading habit_logs.
+    """
+    habit_ids = list(habit_ids)
+    bitmaps: Dict[int, CompletionBitmap] = {habit_id: CompletionBitmap() for habit_id in habit_ids}
+    if not habit_ids:
+        return bitmaps
+
+    query = db.query(HabitLogBitmap.habit_id, HabitLogBitmap.year, HabitLogBitmap.bits).filter(
+        HabitLogBitmap.habit_id.in_(habit_ids)
+    )
+    if start_year is not None:
+        query = query.filter(HabitLogBitmap.year >= start_year)
+    if end_year is not None:
+        query = query.filter(HabitLogBitmap.year <= end_year)
+
+    seen = set()
+    for habit_id, year, bits in query:
+        bitmaps[habit_id].years[year] = int.from_bytes(bits, "little")
+        seen.add(habit_id)
+
+    # A habit with no rows in range is either empty there or was never indexed
+    unindexed = [habit_id for habit_id in habit_ids if habit_id not in seen]
+    if unindexed:
+        indexed = {
+            habit_id for (habit_id,) in db.query(HabitLogBitmap.habit_id).filter(
+                HabitLogBitmap.habit_id.in_(unindexed)
+            ).distinct()
+        }
+        missing = [habit_id for habit_id in unindexed if habit_id not in indexed]
+        if missing:
+            start = date(start_year, 1, 1) if start_year is not None else None
+            end = date(end_year, 12, 31) if end_year is not None else None
+            for habit_id in missing:
+                bitmaps[habit_id].indexed = False
+            for habit_id, day in distinct_log_days(db, missing, start, end):
+                bitmaps[habit_id].set(day)
+    return bitmaps
+
+
+def is_indexed(db: Session, habit_id: int) -> bool:
+    # Locking read: sees rows a concurrent first write committed after this transaction's snapshot
+    return db.query(HabitLogBitmap.id).filter(HabitLogBitmap.habit_id == habit_id).with_for_update().first() is not None
+
+
+def apply_days(db: Session, user_id: int, habit_id: int, changes: Dict[date, bool]):
+    """
+    Set (True) or clear (False) the bit of each day in ``changes``.
+    The caller holds the habit's lock (log_indexes.lock_habits), so missing year rows can be inserted.
+    """
+    years = sorted({day.year for day in changes})
+    rows = {
+        row.year: row for row in db.query(HabitLogBitmap).filter(
+            HabitLogBitmap.habit_id == habit_id,
+            HabitLogBitmap.year.in_(years)
+        ).with_for_update()
+    }
+
+    bitmap = CompletionBitmap({year: int.from_bytes(row.bits, "little") for year, row in rows.items()})
+    for day, logged in changes.items():
+        if logged:
+            bitmap.set(day)
+        else:
+            bitmap.clear(day)
+    for year in years:
+        if year in rows:
+            rows[year].bits = bitmap.to_bytes(year)
+        else:
+            db.add(HabitLogBitmap(user_id=user_id, habit_id=habit_id, year=year, bits=bitmap.to_bytes(year)))
+
+
+def rebuild_bitmaps(db: Session, owners: Dict[int, int], days_by_habit: Dict[int, Set[date]]):
+    """Replace the bitmaps of each habit in ``owners`` (habit_id -> user_id) with ones built from its days."""
+    if not owners:
+        return
+    db.query(HabitLogBitmap).filter(HabitLogBitmap.habit_id.in_(list(owners))).delete(synchronize_session=False)
+    for habit_id, user_id in owners.items():
+        bitmap = CompletionBitmap()
+        for day in days_by_habit.get(habit_id, ()):
+            bitmap.set(day)
+        # Keep at least one row so the habit counts as indexed
+        years = bitmap.years or {datetime.now(timezone.utc).year: 0}
+        for year, bits in years.items():
+            db.add(HabitLogBitmap(
+                user_id=user_id,
+                habit_id=habit_id,
+                year=year,
+                bits=bits.to_bytes(BITMAP_BYTES, "little")
+            ))
+    db.flush()
+
+
+def stored_bitmaps(db: Session, habit_ids: Iterable[int]) -> Dict[int, CompletionBitmap]:
+    """Stored bitmaps per habit, without the habit_logs fallback."""
+    habit_ids = list(habit_ids)
+    bitmaps: Dict[int, CompletionBitmap] = {habit_id: CompletionBitmap() for habit_id in habit_ids}
+    for habit_id, year, bits in db.query(HabitLogBitmap.habit_id, HabitLogBitmap.year, HabitLogBitmap.bits).filter(
+        HabitLogBitmap.habit_id.in_(habit_ids)
+    ):
+        bitmaps[habit_id].years[year] = int.from_bytes(bits, "little")
+    return bitmaps
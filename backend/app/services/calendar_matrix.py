@@ -0,0 +1,35 @@
+import base64
+from datetime import date
+from typing import Dict, Iterable
+from sqlalchemy.orm import Session
+from app.models.habit import HabitLog
+
+
+def completion_bits(
+    db: Session,
+    user_id: int,
+    habit_ids: Iterable[int],
+    start_date: date,
+    end_date: date,
+) -> Dict[int, int]:
+    """
+    Completed days in [start, end] for each habit, packed into an int (bit N = start + N days).
+    One range query over the user's logs.
+    """
+    bits = {habit_id: 0 for habit_id in habit_ids}
+    if not bits:
+        return bits
+    rows = db.query(HabitLog.habit_id, HabitLog.completed_day).filter(
+        HabitLog.user_id == user_id,
+        HabitLog.completed_day >= start_date,
+        HabitLog.completed_day <= end_date
+    )
+    for habit_id, day in rows:
+        if habit_id in bits:
+            bits[habit_id] |= 1 << (day - start_date).days
+    return bits
+
+
+def encode_bits(bits: int, days: int) -> str:
+    """Base64 of the bits as little-endian bytes, one byte per 8 days."""
+    return base64.b64encode(bits.to_bytes((days + 7) // 8, "little")).decode()
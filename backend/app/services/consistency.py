@@ -1,120 +1,138 @@
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
-from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, or_
+from datetime import date, datetime, timedelta, timezone
 from app.models.habit import Habit, HabitLog
 from app.models.user import User
+from app.services.bitmap import load_bitmaps
+from app.services.data_version import bump_data_version
+from app.services.log_indexes import sync_log_day
+from app.services.streaks import current_streaks, longest_streak
+
+@dataclass
+class HabitStats:
+    """Derived per-habit stats computed in memory from completed days."""
+    current_week: List[bool] = field(default_factory=lambda: [False] * 7)
+    consistency_score: float = 0.0
+    streak: int = 0
 
 def get_local_today() -> datetime.date:
     # Here we should technically use the user's timezone.
     # For now, we return UTC date, but the models use timezone-aware datetimes.
     return datetime.now(timezone.utc).date()
 
+def compute_habit_stats(
+    db: Session,
+    user_id: int,
+    habit_ids: Iterable[int],
+    today: Optional[date] = None,
+) -> Dict[int, HabitStats]:
+    """
+    Compute currentWeek, 7-day consistency and current streak for many habits.
+    Reads this week's completion bitmaps in one query and the current streak
+    runs in another, whatever the number of habits or length of history.
+    """
+    habit_ids = list(habit_ids)
+    today = today or get_local_today()
+    monday = today - timedelta(days=today.weekday())
+    week_start = today - timedelta(days=6)
+
+    bitmaps = load_bitmaps(db, habit_ids, start_year=min(monday, week_start).year, end_year=today.year)
+    streaks = current_streaks(db, habit_ids, today)
+
+    # Habits without indexes yet: derive the streak from their full log history
+    unindexed = [habit_id for habit_id, bitmap in bitmaps.items() if not bitmap.indexed]
+    for habit_id, bitmap in load_bitmaps(db, unindexed).items():
+        streak_end = today if bitmap.has(today) else today - timedelta(days=1)
+        streaks[habit_id] = bitmap.run_ending_at(streak_end)
+
+    stats: Dict[int, HabitStats] = {}
+    for habit_id, bitmap in bitmaps.items():
+        stats[habit_id] = HabitStats(
+            current_week=bitmap.slice(monday, today) + [False] * (6 - today.weekday()),
+            consistency_score=(bitmap.count(week_start, today) / 7.0) * 100,
+            streak=streaks[habit_id],
+        )
+    return stats
+
+def refresh_habit_stats(
+    db: Session,
+    user_id: int,
+    habit_ids: Iterable[int],
+    today: Optional[date] = None,
+) -> Dict[int, HabitStats]:
+    """Recompute the denormalized stats on the given habits and store them for today."""
+    today = today or get_local_today()
+    stats = compute_habit_stats(db, user_id, habit_ids, today)
+    for habit_id, habit_stats in stats.items():
+        db.query(Habit).filter(Habit.id == habit_id).update({
+            "consistency_score": habit_stats.consistency_score,
+            "currentWeek": habit_stats.current_week,
+            "streak": habit_stats.streak,
+            "stats_date": today
+        }, synchronize_session=False)
+    return stats
+
+def apply_fresh_stats(db: Session, user_id: int, habits: List[Habit], today: Optional[date] = None) -> List[Habit]:
+    """
+    Make sure the habits carry today's stats without writing anything.
+    Only habits whose stored stats predate today are recomputed.
+    """
+    today = today or get_local_today()
+    stale = [habit for habit in habits if habit.stats_date != today]
+    stats = compute_habit_stats(db, user_id, [habit.id for habit in stale], today)
+    for habit in stale:
+        habit.currentWeek = stats[habit.id].current_week
+        habit.consistency_score = stats[habit.id].consistency_score
+        habit.streak = stats[habit.id].streak
+    return habits
+
+def refresh_stale_habit_stats(db: Session, today: Optional[date] = None) -> int:
+    """Store today's stats on every active habit that is still carrying an older day's."""
+    today = today or get_local_today()
+    stale = db.query(Habit.user_id, Habit.id).filter(
+        Habit.is_active == True,
+        or_(Habit.stats_date == None, Habit.stats_date < today)
+    ).all()
+
+    habits_by_user: Dict[int, List[int]] = defaultdict(list)
+    for user_id, habit_id in stale:
+        habits_by_user[user_id].append(habit_id)
+    for user_id, habit_ids in habits_by_user.items():
+        refresh_habit_stats(db, user_id, habit_ids, today)
+        bump_data_version(db, user_id)
+    return len(stale)
+
 def calculate_7_day_consistency(db: Session, habit_id: int, user_id: int) -> float:
     """
     Calculate the 7-day rolling consistency score.
     Returns a percentage (0.0 to 100.0).
     """
-    today = get_local_today()
-    start_date = today - timedelta(days=6) # 7 days including today
-    
-    # Get the habit to ensure it exists
-    habit = db.query(Habit).filter(Habit.id == habit_id).first()
-    if not habit:
-        return 0.0
-    
-    completions = db.query(func.count(HabitLog.id)).filter(
-        and_(
-            HabitLog.habit_id == habit_id,
-            HabitLog.user_id == user_id,
-            func.date(HabitLog.completed_date) >= start_date,
-            func.date(HabitLog.completed_date) <= today
-        )
-    ).scalar()
-    
-    # Cap completions at 7 (in case of multiple logs per day)
-    completions = min(completions, 7)
-    
-    return (completions / 7.0) * 100
+    return compute_habit_stats(db, user_id, [habit_id])[habit_id].consistency_score
 
 def calculate_current_streak(db: Session, habit_id: int, user_id: int) -> int:
     """Calculate current streak of days with logs for a habit."""
-    today = get_local_today()
-    streak = 0
-    current_date = today
-    
-    # Check if logged today
-    log_today = db.query(HabitLog).filter(
-        and_(
-            HabitLog.habit_id == habit_id,
-            HabitLog.user_id == user_id,
-            func.date(HabitLog.completed_date) == today
-        )
-    ).first()
-    
-    if not log_today:
-        # If not logged today, check yesterday to see if streak is still alive
-        current_date = today - timedelta(days=1)
-    
-    while True:
-        log = db.query(HabitLog).filter(
-            and_(
-                HabitLog.habit_id == habit_id,
-                HabitLog.user_id == user_id,
-                func.date(HabitLog.completed_date) == current_date
-            )
-        ).first()
-        
-        if log:
-            streak += 1
-            current_date -= timedelta(days=1)
-        else:
-            break
-            
-    return streak
+    return compute_habit_stats(db, user_id, [habit_id])[habit_id].streak
 
 def calculate_longest_streak(db: Session, habit_id: int, user_id: int) -> int:
     """Calculate the longest streak of all time for a habit."""
-    logs = db.query(HabitLog).filter(
-        and_(
-            HabitLog.habit_id == habit_id,
-            HabitLog.user_id == user_id
-        )
-    ).order_by(HabitLog.completed_date).all()
-    
-    if not logs:
-        return 0
-    
-    max_streak = 0
-    current_streak = 0
-    last_date = None
-    
-    for log in logs:
-        log_date = log.completed_date.date()
-        if last_date is None:
-            current_streak = 1
-        elif log_date == last_date + timedelta(days=1):
-            current_streak += 1
-        elif log_date == last_date:
-            continue # Same day, don't increment or break
-        else:
-            current_streak = 1
-            
-        last_date = log_date
-        max_streak = max(max_streak, current_streak)
-        
-    return max_streak
+    return longest_streak(db, habit_id)
 
-def check_and_award_rest_tokens(db: Session, user_id: int, habit_id: int):
+def check_and_award_rest_tokens(db: Session, user_id: int, habit_id: int, streak: Optional[int] = None):
     """
     If a user has reached a multiple of 7 days in their streak, award 1 rest token.
+    Pass ``streak`` when the caller already has it. The caller commits.
     """
-    streak = calculate_current_streak(db, habit_id, user_id)
+    if streak is None:
+        streak = calculate_current_streak(db, habit_id, user_id)
     if streak > 0 and streak % 7 == 0:
-        user = db.query(User).filter(User.id == user_id).first()
-        if user:
-            # Award a token only if we just hit a multiple of 7
-            user.rest_tokens_available += 1
-            db.commit()
+        # Award a token only if we just hit a multiple of 7
+        db.query(User).filter(User.id == user_id).update(
+            {User.rest_tokens_available: func.coalesce(User.rest_tokens_available, 0) + 1},
+            synchronize_session=False
+        )
 
 def use_rest_token_if_available(db: Session, user_id: int, habit_id: int, missed_date: datetime.date) -> bool:
     """
@@ -133,6 +151,7 @@ def use_rest_token_if_available(db: Session, user_id: int, habit_id: int, missed
             notes="Rest Token Used"
         )
         db.add(pseudo_log)
+        sync_log_day(db, user_id, habit_id, missed_date)
         db.commit()
         return True
     return False
@@ -0,0 +1,15 @@
+from sqlalchemy.orm import Session
+from app.models.user import User
+
+
+def bump_data_version(db: Session, user_id: int):
+    """Mark the user's habit data as changed, invalidating ETags and caches derived from it. The caller commits."""
+    db.query(User).filter(User.id == user_id).update(
+        {User.data_version: User.data_version + 1},
+        synchronize_session=False
+    )
+
+
+def get_data_version(db: Session, user_id: int) -> int:
+    """The user's current data version, read by primary key."""
+    return db.query(User.data_version).filter(User.id == user_id).scalar() or 0
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Dict, Iterator
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.habit import Habit, HabitLog
+from app.models.habit_summary import HabitSummary
+
+# Rows fetched per round trip; the driver streams them through a server-side cursor
+BATCH_SIZE = 1000
+# Bytes of encoded output collected before a chunk is handed to the response
+CHUNK_SIZE = 64 * 1024
+
+HABIT_COLUMNS = [
+    Habit.id, Habit.name, Habit.description, Habit.frequency, Habit.weekly_goal,
+    Habit.is_active, Habit.tags, Habit.icon, Habit.identity_id, Habit.created_at
+]
+LOG_COLUMNS = [HabitLog.id, HabitLog.habit_id, HabitLog.completed_date, HabitLog.notes, HabitLog.used_rest_token]
+SUMMARY_COLUMNS = [
+    HabitSummary.id, HabitSummary.habit_id, HabitSummary.summary_date, HabitSummary.completion_rate,
+    HabitSummary.consistency_score, HabitSummary.current_streak, HabitSummary.longest_streak,
+    HabitSummary.total_completions
+]
+
+# One CSV header covering every record type; cells that don't apply are left empty
+CSV_FIELDS = ["type"] + list(dict.fromkeys(
+    column.key for column in HABIT_COLUMNS + LOG_COLUMNS + SUMMARY_COLUMNS
+))
+
+
+def _stream(db: Session, record_type: str, columns, *criteria) -> Iterator[Dict[str, Any]]:
+    statement = select(*columns).where(*criteria).order_by(columns[0]).execution_options(yield_per=BATCH_SIZE)
+    for row in db.execute(statement).mappings():
+        yield {"type": record_type, **row}
+
+
+def export_records(db: Session, user_id: int) -> Iterator[Dict[str, Any]]:
+    """Yield every habit, log and summary of a user, one dict per record, without loading them all."""
+    yield from _stream(db, "habit", HABIT_COLUMNS, Habit.user_id == user_id)
+    yield from _stream(db, "log", LOG_COLUMNS, HabitLog.user_id == user_id)
+    yield from _stream(db, "summary", SUMMARY_COLUMNS, HabitSummary.user_id == user_id)
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_ndjson(records: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, default=_json_default) + "\n"
+
+
+def encode_csv(records: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for record in records:
+        if isinstance(record.get("tags"), list):
+            record["tags"] = json.dumps(record["tags"])
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def chunked(lines: Iterator[str], gzip: bool = False) -> Iterator[bytes]:
+    """Group encoded lines into chunks of about CHUNK_SIZE bytes, gzip-compressing them on the fly if asked."""
+    compressor = zlib.compressobj(wbits=31) if gzip else None
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode()
+        pending.append(data)
+        size += len(data)
+        if size >= CHUNK_SIZE:
+            chunk = b"".join(pending)
+            pending, size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+    chunk = b"".join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
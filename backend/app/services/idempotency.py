@@ -0,0 +1,69 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+from app.database import insert_ignore
+from app.models.idempotency import IdempotencyKey
+
+# How long a stored response can be replayed before its key may be reused
+KEY_TTL = timedelta(hours=24)
+
+
+def request_hash(method: str, path: str, payload: Any) -> str:
+    body = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(f"{method} {path}\n{body}".encode()).hexdigest()
+
+
+def claim_key(db: Session, user_id: int, key: str, fingerprint: str) -> Optional[JSONResponse]:
+    """
+    Claim ``key`` for this request inside the caller's transaction.
+    Returns the stored response when the key was already used, or None when the request should run.
+    A concurrent request holding the same key blocks here until that request commits.
+    """
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.created_at < datetime.now(timezone.utc) - KEY_TTL
+    ).delete(synchronize_session=False)
+
+    claimed = db.execute(
+        insert_ignore(db, IdempotencyKey, ["user_id", "key"]).values(
+            user_id=user_id,
+            key=key,
+            request_hash=fingerprint
+        )
+    ).rowcount == 1
+    if claimed:
+        return None
+
+    # Locking read, so a key committed by a concurrent request after our snapshot is visible
+    record = db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).with_for_update().first()
+    if record is None or record.request_hash != fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used for a different request"
+        )
+    if record.status_code is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A request with this Idempotency-Key is still in progress"
+        )
+    return JSONResponse(
+        status_code=record.status_code,
+        content=record.response_body,
+        headers={"Idempotent-Replayed": "true"}
+    )
+
+
+def store_response(db: Session, user_id: int, key: str, status_code: int, body: Any):
+    """Record the response for a claimed key. The caller commits it with the request's own writes."""
+    db.query(IdempotencyKey).filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key
+    ).update({"status_code": status_code, "response_body": body}, synchronize_session=False)
@@ -0,0 +1,168 @@
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.database import insert_ignore
+from app.models.habit import Habit, HabitLog
+from app.services.consistency import get_local_today, refresh_habit_stats
+from app.services.data_version import bump_data_version
+from app.services.log_indexes import rebuild_log_indexes
+from app.services.rollups import rebuild_daily_rollups
+from app.services.summaries import update_habit_summary
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 20
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    habits_created: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def parse_records(lines: Iterable[str], format: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (line number, record) from CSV or NDJSON text without reading it all in."""
+    if format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        # Valid JSON that is not an object (a list, a number) is a failed row too
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def _parse_completed_date(value) -> datetime:
+    completed_date = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if completed_date.tzinfo is None:
+        completed_date = completed_date.replace(tzinfo=timezone.utc)
+    return completed_date
+
+
+def _parse_flag(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in ("1", "true", "yes")
+
+
+class _HabitResolver:
+    """Map a record's habit_id or habit name to one of the user's habits, creating named habits as needed."""
+
+    def __init__(self, db: Session, user_id: int, result: ImportResult):
+        self.db, self.user_id, self.result = db, user_id, result
+        self.ids = set()
+        self.by_name: Dict[str, int] = {}
+        for habit_id, name in db.query(Habit.id, Habit.name).filter(Habit.user_id == user_id):
+            self.ids.add(habit_id)
+            self.by_name.setdefault(name.strip().lower(), habit_id)
+
+    def resolve(self, record: dict) -> int:
+        if record.get("habit_id") not in (None, ""):
+            habit_id = int(record["habit_id"])
+            if habit_id not in self.ids:
+                raise ValueError(f"habit {habit_id} not found")
+            return habit_id
+        name = str(record.get("habit") or record.get("habit_name") or "").strip()
+        if not name:
+            raise ValueError("missing habit_id or habit name")
+        if name.lower() not in self.by_name:
+            habit = Habit(user_id=self.user_id, name=name, consistency_score=0.0, streak=0)
+            self.db.add(habit)
+            self.db.flush()
+            self.ids.add(habit.id)
+            self.by_name[name.lower()] = habit.id
+            self.result.habits_created += 1
+        return self.by_name[name.lower()]
+
+
+def import_logs(
+    db: Session,
+    user_id: int,
+    records: Iterable[Tuple[int, Optional[dict]]],
+    batch_size: int = BATCH_SIZE,
+    progress: Optional[Callable[[ImportResult], None]] = None,
+) -> ImportResult:
+    """
+    Insert logs from parsed records in multi-row batches, skipping days that are already logged.
+    Indexes, stats and summaries of the touched habits are rebuilt once at the end. The caller commits.
+    Records of another type (exported habits and summaries) are ignored.
+    """
+    result = ImportResult()
+    started = time.monotonic()
+    habits = _HabitResolver(db, user_id, result)
+    touched = set()
+    batch: Dict[Tuple[int, object], dict] = {}
+
+    def flush_batch():
+        if batch:
+            inserted = db.execute(
+                insert_ignore(db, HabitLog, ["user_id", "habit_id", "completed_day"]).values(list(batch.values()))
+            ).rowcount
+            result.inserted += inserted
+            result.duplicates += len(batch) - inserted
+            batch.clear()
+        result.seconds = time.monotonic() - started
+        if progress:
+            progress(result)
+
+    for line_number, record in records:
+        if record is not None and record.get("type", "log") not in ("log", ""):
+            continue
+        result.rows += 1
+        try:
+            if record is None:
+                raise ValueError("not a JSON object")
+            habit_id = habits.resolve(record)
+            completed_date = _parse_completed_date(record["completed_date"])
+        except (KeyError, TypeError, ValueError) as e:
+            result.failed += 1
+            if len(result.errors) < MAX_REPORTED_ERRORS:
+                result.errors.append(f"line {line_number}: {e}")
+            continue
+
+        key = (habit_id, completed_date.date())
+        if key in batch:
+            result.duplicates += 1
+            continue
+        batch[key] = {
+            "user_id": user_id,
+            "habit_id": habit_id,
+            "completed_date": completed_date,
+            "completed_day": completed_date.date(),
+            "notes": record.get("notes") or None,
+            "used_rest_token": _parse_flag(record.get("used_rest_token"))
+        }
+        touched.add(habit_id)
+        if len(batch) >= batch_size:
+            flush_batch()
+    flush_batch()
+
+    # Rebuild derived data once for every habit that received rows
+    if touched:
+        rebuild_log_indexes(db, touched)
+        rebuild_daily_rollups(db, [user_id])
+        bump_data_version(db, user_id)
+        today = get_local_today()
+        stats = refresh_habit_stats(db, user_id, touched, today)
+        for habit_id in touched:
+            update_habit_summary(db, user_id, habit_id, today, habit_stats=stats[habit_id])
+    result.seconds = time.monotonic() - started
+    return result
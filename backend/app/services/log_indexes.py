@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Iterable, List, Set
+from sqlalchemy.orm import Session
+from app.models.habit import Habit, HabitLog
+from app.services import bitmap, rollups, streaks
+from app.services.data_version import bump_data_version
+
+
+def lock_habits(db: Session, habit_ids: Iterable[int]):
+    """
+    Lock the habits' rows until the transaction ends. Index maintenance holds this lock, so
+    concurrent writes to neighbouring days of a habit can't both start a run for it.
+    """
+    db.query(Habit.id).filter(Habit.id.in_(sorted(habit_ids))).order_by(Habit.id).with_for_update().all()
+
+
+def sync_log_day(db: Session, user_id: int, habit_id: int, day: date):
+    """
+    Bring every index derived from habit_logs in line for one habit and day,
+    including the user's daily rollup and data version.
+    Call after adding or deleting a log, inside the same transaction.
+    """
+    db.flush()
+    bump_data_version(db, user_id)
+    lock_habits(db, [habit_id])
+    rollups.refresh_daily_rollups(db, user_id, [day])
+    if not bitmap.is_indexed(db, habit_id):
+        # First write for a never-indexed habit: index its whole history
+        rebuild_log_indexes(db, [habit_id])
+        return
+
+    logged = db.query(HabitLog.id).filter(
+        HabitLog.user_id == user_id,
+        HabitLog.habit_id == habit_id,
+        HabitLog.completed_day == day
+    ).first() is not None
+
+    bitmap.apply_days(db, user_id, habit_id, {day: logged})
+    if logged:
+        streaks.add_day(db, user_id, habit_id, day)
+    else:
+        streaks.remove_day(db, user_id, habit_id, day)
+    db.flush()
+
+
+def sync_log_days(db: Session, user_id: int, habit_id: int, days: Iterable[date]):
+    """Batch form of sync_log_day for many days of one habit."""
+    days = set(days)
+    if not days:
+        return
+    db.flush()
+    bump_data_version(db, user_id)
+    lock_habits(db, [habit_id])
+    rollups.refresh_daily_rollups(db, user_id, days)
+    if not bitmap.is_indexed(db, habit_id):
+        rebuild_log_indexes(db, [habit_id])
+        return
+
+    logged = {
+        day for (day,) in db.query(HabitLog.completed_day).filter(
+            HabitLog.user_id == user_id,
+            HabitLog.habit_id == habit_id,
+            HabitLog.completed_day.in_(days)
+        )
+    }
+    bitmap.apply_days(db, user_id, habit_id, {day: day in logged for day in days})
+    streaks.apply_days(db, user_id, habit_id, added=logged, removed=days - logged)
+    db.flush()
+
+
+def _log_days(db: Session, habit_ids: List[int]) -> Dict[int, Set[date]]:
+    days: Dict[int, Set[date]] = {habit_id: set() for habit_id in habit_ids}
+    for habit_id, day in bitmap.distinct_log_days(db, habit_ids):
+        days[habit_id].add(day)
+    return days
+
+
+def rebuild_log_indexes(db: Session, habit_ids: Iterable[int]):
+    """Rebuild the bitmaps and streak runs for the given habits from habit_logs."""
+    habit_ids = list(habit_ids)
+    if not habit_ids:
+        return
+    lock_habits(db, habit_ids)
+    owners = dict(db.query(Habit.id, Habit.user_id).filter(Habit.id.in_(habit_ids)))
+    days = _log_days(db, list(owners))
+    bitmap.rebuild_bitmaps(db, owners, days)
+    streaks.rebuild_streak_runs(db, owners, days)
+
+
+@dataclass
+class LogIndexMismatch:
+    index: str
+    habit_id: int
+    day: date
+    detail: str
+
+
+def verify_log_indexes(db: Session, habit_ids: Iterable[int]) -> List[LogIndexMismatch]:
+    """Compare every derived index against habit_logs and report the differences."""
+    habit_ids = list(habit_ids)
+    logged = _log_days(db, habit_ids)
+    bitmaps = bitmap.stored_bitmaps(db, habit_ids)
+    runs = streaks.stored_runs(db, habit_ids)
+
+    mismatches: List[LogIndexMismatch] = []
+    for habit_id in habit_ids:
+        expected = logged[habit_id]
+        marked = set(bitmaps[habit_id].days())
+        for day in sorted(expected ^ marked):
+            detail = "missing bit" if day in expected else "stray bit"
+            mismatches.append(LogIndexMismatch("bitmap", habit_id, day, detail))
+
+        expected_runs = streaks.runs_from_days(expected)
+        stored = [(start_day, end_day) for start_day, end_day, _ in runs[habit_id]]
+        for start_day, end_day in sorted(set(expected_runs) ^ set(stored)):
+            detail = "missing run" if (start_day, end_day) in expected_runs else "stray run"
+            mismatches.append(LogIndexMismatch("streak_runs", habit_id, start_day, f"{detail} to {end_day}"))
+        for start_day, end_day, length in runs[habit_id]:
+            if length != (end_day - start_day).days + 1:
+                mismatches.append(LogIndexMismatch("streak_runs", habit_id, start_day, f"bad length {length}"))
+    return mismatches
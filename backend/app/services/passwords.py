@@ -0,0 +1,100 @@
+import asyncio
+import hashlib
+import hmac
+import secrets
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+from app.config import settings
+
+ALGORITHM = "pbkdf2_sha256"
+LEGACY_ITERATIONS = 100000  # "salt:hash" values written before hashes recorded their cost
+
+
+def _pbkdf2(password: str, salt: str, iterations: int) -> str:
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations).hex()
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
+    """Hash as ``pbkdf2_sha256$<iterations>$<salt>$<hash>``. CPU-bound; run it through the hasher."""
+    iterations = iterations or settings.password_hash_iterations
+    salt = secrets.token_hex(16)
+    return f"{ALGORITHM}${iterations}${salt}${_pbkdf2(password, salt, iterations)}"
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    """Check a password against a hash in the current or the legacy ``salt:hash`` format."""
+    try:
+        if hashed.startswith(f"{ALGORITHM}$"):
+            _, iterations, salt, pwd_hash = hashed.split("$")
+            iterations = int(iterations)
+        else:
+            salt, pwd_hash = hashed.split(":")
+            iterations = LEGACY_ITERATIONS
+    except (AttributeError, ValueError):
+        return False
+    return hmac.compare_digest(_pbkdf2(password, salt, iterations), pwd_hash)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True when the hash uses the legacy format or a cost other than the configured one."""
+    return not hashed.startswith(f"{ALGORITHM}${settings.password_hash_iterations}$")
+
+
+class HasherBusy(Exception):
+    """Raised instead of queueing when the hasher already has its maximum number of jobs waiting."""
+
+
+class PasswordHasher:
+    """
+    Runs password hashing on a small dedicated thread pool so it never occupies the API's
+    request threads. hashlib releases the GIL while hashing, so threads run in parallel.
+    At most ``max_pending`` jobs wait for a worker; beyond that submissions fail fast with
+    HasherBusy, which the API answers with 503.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.rejected = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+
+    def submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_pending:
+                self.rejected += 1
+                raise HasherBusy()
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args):
+        """Await ``fn(*args)`` on the hashing pool without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": in_flight,
+            "rejected": self.rejected
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending
+)
@@ -0,0 +1,70 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.database import upsert
+from app.models.daily_rollup import UserDailyRollup
+from app.models.habit import Habit, HabitLog
+
+
+def _active_habit_count(user_id: int):
+    return select(func.count(Habit.id)).where(
+        Habit.user_id == user_id,
+        Habit.is_active == True
+    ).scalar_subquery()
+
+
+def refresh_daily_rollups(db: Session, user_id: int, days: Iterable[date]):
+    """Recount the user's rollup row for each day from habit_logs. Call after the logs change, before commit."""
+    for day in sorted(set(days)):
+        day_logs = (HabitLog.user_id == user_id, HabitLog.completed_day == day)
+        db.execute(upsert(
+            db,
+            UserDailyRollup,
+            ["user_id", "day"],
+            {
+                "user_id": user_id,
+                "day": day,
+                "completions": select(func.count(HabitLog.id)).where(*day_logs).scalar_subquery(),
+                "active_habits": _active_habit_count(user_id),
+                "habits_completed": select(func.count(HabitLog.id)).join(
+                    Habit, Habit.id == HabitLog.habit_id
+                ).where(*day_logs, Habit.is_active == True).scalar_subquery()
+            },
+            update_columns=["completions", "active_habits", "habits_completed"]
+        ))
+
+
+def rebuild_daily_rollups(db: Session, user_ids: Iterable[int]):
+    """Replace the rollup rows of the given users with ones computed from habit_logs."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    db.query(UserDailyRollup).filter(UserDailyRollup.user_id.in_(user_ids)).delete(synchronize_session=False)
+
+    active_habits = dict(db.query(Habit.user_id, func.count(Habit.id)).filter(
+        Habit.user_id.in_(user_ids),
+        Habit.is_active == True
+    ).group_by(Habit.user_id))
+    totals: Dict[tuple, List[int]] = defaultdict(lambda: [0, 0])
+    for user_id, day, is_active, count in db.query(
+        HabitLog.user_id, HabitLog.completed_day, Habit.is_active, func.count(HabitLog.id)
+    ).join(Habit, Habit.id == HabitLog.habit_id).filter(
+        HabitLog.user_id.in_(user_ids)
+    ).group_by(HabitLog.user_id, HabitLog.completed_day, Habit.is_active):
+        totals[(user_id, day)][0] += count
+        if is_active:
+            totals[(user_id, day)][1] += count
+
+    db.bulk_insert_mappings(UserDailyRollup, [
+        {
+            "user_id": user_id,
+            "day": day,
+            "completions": completions,
+            "active_habits": active_habits.get(user_id, 0),
+            "habits_completed": habits_completed
+        }
+        for (user_id, day), (completions, habits_completed) in totals.items()
+    ])
+    db.flush()
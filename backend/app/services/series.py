@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.daily_rollup import UserDailyRollup
+from app.models.habit import Habit, HabitLog
+from app.services.consistency import get_local_today
+
+BUCKETS = ("day", "week", "month")
+
+
+@dataclass
+class SeriesPoint:
+    start: date
+    end: date
+    completions: int = 0
+    completion_rate: float = 0.0
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_ranges(start_date: date, end_date: date, bucket: str, months_per_point: int = 1) -> List[Tuple[date, date]]:
+    """Calendar-aligned [start, end] ranges covering the dates, clipped to them."""
+    ranges = []
+    start = bucket_start(start_date, bucket)
+    while start <= end_date:
+        end = start
+        for _ in range(months_per_point if bucket == "month" else 1):
+            end = _next_bucket(end, bucket)
+        ranges.append((max(start, start_date), min(end - timedelta(days=1), end_date)))
+        start = end
+    return ranges
+
+
+def _daily_totals(
+    db: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    habit_id: Optional[int],
+    identity_id: Optional[int],
+) -> Tuple[Dict[date, Tuple[int, int, int]], int]:
+    """
+    (logs, habits completed, habits possible) per day, plus the number of possible
+    completions assumed for days without data. Reads the daily rollup, or the matching
+    habits' logs when filtered.
+    """
+    if habit_id is None and identity_id is None:
+        active_now = db.query(func.count(Habit.id)).filter(
+            Habit.user_id == user_id, Habit.is_active == True
+        ).scalar()
+        rows = db.query(
+            UserDailyRollup.day, UserDailyRollup.completions, UserDailyRollup.habits_completed, UserDailyRollup.active_habits
+        ).filter(
+            UserDailyRollup.user_id == user_id,
+            UserDailyRollup.day >= start_date,
+            UserDailyRollup.day <= end_date
+        )
+        return {day: (completions, completed, active) for day, completions, completed, active in rows}, active_now
+
+    habits = db.query(Habit.id).filter(Habit.user_id == user_id)
+    if habit_id is not None:
+        habits = habits.filter(Habit.id == habit_id)
+    else:
+        habits = habits.filter(Habit.identity_id == identity_id, Habit.is_active == True)
+    habit_ids = [matched_id for (matched_id,) in habits]
+    if not habit_ids:
+        return {}, 0
+    rows = db.query(HabitLog.completed_day, func.count(HabitLog.id)).filter(
+        HabitLog.user_id == user_id,
+        HabitLog.habit_id.in_(habit_ids),
+        HabitLog.completed_day >= start_date,
+        HabitLog.completed_day <= end_date
+    ).group_by(HabitLog.completed_day)
+    return {day: (count, count, len(habit_ids)) for day, count in rows}, len(habit_ids)
+
+
+def fold_series(
+    daily: Dict[date, Tuple[int, int, int]],
+    capacity: int,
+    bucket: str,
+    start_date: date,
+    end_date: date,
+    max_points: int = 120,
+    today: Optional[date] = None,
+) -> Tuple[str, List[SeriesPoint]]:
+    """
+    Fold per-day (logs, habits completed, habits possible) into buckets.
+    When the range holds more than ``max_points`` buckets, the bucket is widened
+    (day -> week -> month -> several months) and the effective bucket is returned.
+    """
+    months_per_point = 1
+    while len(bucket_ranges(start_date, end_date, bucket)) > max_points and bucket != "month":
+        bucket = BUCKETS[BUCKETS.index(bucket) + 1]
+    if bucket == "month":
+        while len(bucket_ranges(start_date, end_date, bucket, months_per_point)) > max_points:
+            months_per_point += 1
+
+    today = today or get_local_today()
+    points = []
+    for start, end in bucket_ranges(start_date, end_date, bucket, months_per_point):
+        completions = completed = possible = 0
+        day = start
+        while day <= end and day <= today:
+            day_completions, day_completed, day_possible = daily.get(day, (0, 0, capacity))
+            completions += day_completions
+            completed += day_completed
+            possible += day_possible
+            day += timedelta(days=1)
+        points.append(SeriesPoint(
+            start=start,
+            end=end,
+            completions=completions,
+            completion_rate=round(min(completed / possible, 1.0) * 100, 2) if possible else 0.0
+        ))
+    label = bucket if months_per_point == 1 else f"{months_per_point}month"
+    return label, points
+
+
+def completion_series(
+    db: Session,
+    user_id: int,
+    bucket: str,
+    start_date: date,
+    end_date: date,
+    habit_id: Optional[int] = None,
+    identity_id: Optional[int] = None,
+    max_points: int = 120,
+    today: Optional[date] = None,
+) -> Tuple[str, List[SeriesPoint]]:
+    """Completions and completion rate per bucket, from one grouped-by-day query."""
+    daily, capacity = _daily_totals(db, user_id, start_date, end_date, habit_id, identity_id)
+    return fold_series(daily, capacity, bucket, start_date, end_date, max_points, today)
+
+
+def daily_counts(
+    db: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    habit_id: Optional[int] = None,
+) -> List[int]:
+    """Completions on every day from start to end, zeros included, from one grouped-by-day query."""
+    if habit_id is None:
+        rows = db.query(UserDailyRollup.day, UserDailyRollup.completions).filter(
+            UserDailyRollup.user_id == user_id,
+            UserDailyRollup.day >= start_date,
+            UserDailyRollup.day <= end_date
+        )
+    else:
+        rows = db.query(HabitLog.completed_day, func.count(HabitLog.id)).filter(
+            HabitLog.user_id == user_id,
+            HabitLog.habit_id == habit_id,
+            HabitLog.completed_day >= start_date,
+            HabitLog.completed_day <= end_date
+        ).group_by(HabitLog.completed_day)
+    counts = [0] * ((end_date - start_date).days + 1)
+    for day, count in rows:
+        counts[(day - start_date).days] = count
+    return counts
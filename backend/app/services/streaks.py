@@ -0,0 +1,166 @@
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.streak_run import HabitStreakRun
+
+
+def _run_containing(db: Session, habit_id: int, day: date):
+    return db.query(HabitStreakRun).filter(
+        HabitStreakRun.habit_id == habit_id,
+        HabitStreakRun.start_day <= day,
+        HabitStreakRun.end_day >= day
+    ).with_for_update().first()
+
+
+def _set_bounds(run: HabitStreakRun, start_day: date, end_day: date):
+    run.start_day = start_day
+    run.end_day = end_day
+    run.length = (end_day - start_day).days + 1
+
+
+def add_day(db: Session, user_id: int, habit_id: int, day: date):
+    """Mark ``day`` completed, extending or merging the neighbouring runs."""
+    if _run_containing(db, habit_id, day):
+        return
+
+    before = db.query(HabitStreakRun).filter(
+        HabitStreakRun.habit_id == habit_id,
+        HabitStreakRun.end_day == day - timedelta(days=1)
+    ).with_for_update().first()
+    after = db.query(HabitStreakRun).filter(
+        HabitStreakRun.habit_id == habit_id,
+        HabitStreakRun.start_day == day + timedelta(days=1)
+    ).with_for_update().first()
+
+    if before and after:
+        _set_bounds(before, before.start_day, after.end_day)
+        db.delete(after)
+    elif before:
+        _set_bounds(before, before.start_day, day)
+    elif after:
+        _set_bounds(after, day, after.end_day)
+    else:
+        db.add(HabitStreakRun(user_id=user_id, habit_id=habit_id, start_day=day, end_day=day, length=1))
+
+
+def remove_day(db: Session, user_id: int, habit_id: int, day: date):
+    """Mark ``day`` not completed, shrinking or splitting the run that holds it."""
+    run = _run_containing(db, habit_id, day)
+    if not run:
+        return
+
+    start_day, end_day = run.start_day, run.end_day
+    if start_day == end_day:
+        db.delete(run)
+    elif day == start_day:
+        _set_bounds(run, day + timedelta(days=1), end_day)
+    elif day == end_day:
+        _set_bounds(run, start_day, day - timedelta(days=1))
+    else:
+        _set_bounds(run, start_day, day - timedelta(days=1))
+        tail_start = day + timedelta(days=1)
+        db.add(HabitStreakRun(
+            user_id=user_id,
+            habit_id=habit_id,
+            start_day=tail_start,
+            end_day=end_day,
+            length=(end_day - tail_start).days + 1
+        ))
+
+
+def apply_days(db: Session, user_id: int, habit_id: int, added: Set[date], removed: Set[date]):
+    """
+    Apply a batch of added and removed days at once.
+    Only the runs touching the changed span are rewritten.
+    """
+    if not added and not removed:
+        return
+    changed = added | removed
+    first, last = min(changed), max(changed)
+
+    touching = db.query(HabitStreakRun).filter(
+        HabitStreakRun.habit_id == habit_id,
+        HabitStreakRun.start_day <= last + timedelta(days=1),
+        HabitStreakRun.end_day >= first - timedelta(days=1)
+    ).with_for_update().all()
+
+    days: Set[date] = set()
+    for run in touching:
+        days.update(run.start_day + timedelta(days=i) for i in range(run.length))
+        db.delete(run)
+    days = (days | added) - removed
+    db.flush()
+
+    for start_day, end_day in runs_from_days(days):
+        db.add(HabitStreakRun(
+            user_id=user_id,
+            habit_id=habit_id,
+            start_day=start_day,
+            end_day=end_day,
+            length=(end_day - start_day).days + 1
+        ))
+
+
+def current_streaks(db: Session, habit_ids: Iterable[int], today: date) -> Dict[int, int]:
+    """Current streak per habit: the run covering today, or else yesterday."""
+    habit_ids = list(habit_ids)
+    streaks = {habit_id: 0 for habit_id in habit_ids}
+    if not habit_ids:
+        return streaks
+
+    runs = db.query(HabitStreakRun.habit_id, HabitStreakRun.start_day, HabitStreakRun.end_day).filter(
+        HabitStreakRun.habit_id.in_(habit_ids),
+        HabitStreakRun.start_day <= today,
+        HabitStreakRun.end_day >= today - timedelta(days=1)
+    )
+    for habit_id, start_day, end_day in runs:
+        streaks[habit_id] = (min(end_day, today) - start_day).days + 1
+    return streaks
+
+
+def longest_streak(db: Session, habit_id: int) -> int:
+    """Longest streak of all time for a habit."""
+    return db.query(func.max(HabitStreakRun.length)).filter(
+        HabitStreakRun.habit_id == habit_id
+    ).scalar() or 0
+
+
+def runs_from_days(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Collapse completed days into maximal (start_day, end_day) runs."""
+    runs: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if runs and runs[-1][1] == day - timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def rebuild_streak_runs(db: Session, owners: Dict[int, int], days_by_habit: Dict[int, Set[date]]):
+    """Replace the runs of each habit in ``owners`` (habit_id -> user_id) with ones built from its days."""
+    if not owners:
+        return
+    db.query(HabitStreakRun).filter(HabitStreakRun.habit_id.in_(list(owners))).delete(synchronize_session=False)
+    for habit_id, user_id in owners.items():
+        for start_day, end_day in runs_from_days(days_by_habit.get(habit_id, ())):
+            db.add(HabitStreakRun(
+                user_id=user_id,
+                habit_id=habit_id,
+                start_day=start_day,
+                end_day=end_day,
+                length=(end_day - start_day).days + 1
+            ))
+    db.flush()
+
+
+def stored_runs(db: Session, habit_ids: Iterable[int]) -> Dict[int, List[Tuple[date, date, int]]]:
+    """Stored (start_day, end_day, length) runs per habit, ordered by start_day."""
+    habit_ids = list(habit_ids)
+    runs: Dict[int, List[Tuple[date, date, int]]] = {habit_id: [] for habit_id in habit_ids}
+    query = db.query(
+        HabitStreakRun.habit_id, HabitStreakRun.start_day, HabitStreakRun.end_day, HabitStreakRun.length
+    ).filter(HabitStreakRun.habit_id.in_(habit_ids)).order_by(HabitStreakRun.habit_id, HabitStreakRun.start_day)
+    for habit_id, start_day, end_day, length in query:
+        runs[habit_id].append((start_day, end_day, length))
+    return runs
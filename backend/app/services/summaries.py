@@ -0,0 +1,53 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.database import upsert
+from app.models.habit import HabitLog
+from app.models.habit_summary import HabitSummary
+from app.models.streak_run import HabitStreakRun
+from app.services.consistency import HabitStats, refresh_habit_stats
+
+
+def update_habit_summary(
+    db: Session,
+    user_id: int,
+    habit_id: int,
+    summary_date: date,
+    habit_stats: Optional[HabitStats] = None
+) -> HabitStats:
+    """
+    Refresh a habit's stored stats and its summary for ``summary_date``.
+    Pass ``habit_stats`` when they were already refreshed. The caller commits.
+    """
+    # Refresh the habit's 7-day rolling consistency score and streaks
+    if habit_stats is None:
+        habit_stats = refresh_habit_stats(db, user_id, [habit_id])[habit_id]
+
+    # Counts come from the database as scalar subqueries, so the write is a single statement
+    total_completions = select(func.count(HabitLog.id)).where(
+        HabitLog.user_id == user_id,
+        HabitLog.habit_id == habit_id
+    ).scalar_subquery()
+    longest_streak = select(func.coalesce(func.max(HabitStreakRun.length), 0)).where(
+        HabitStreakRun.habit_id == habit_id
+    ).scalar_subquery()
+
+    db.execute(upsert(
+        db,
+        HabitSummary,
+        ["user_id", "habit_id", "summary_date"],
+        {
+            "user_id": user_id,
+            "habit_id": habit_id,
+            "summary_date": datetime.combine(summary_date, datetime.min.time(), tzinfo=timezone.utc),
+            "consistency_score": habit_stats.consistency_score,
+            # Use consistency_score as completion_rate for the daily summary
+            "completion_rate": habit_stats.consistency_score,
+            "current_streak": habit_stats.streak,
+            "longest_streak": longest_streak,
+            "total_completions": total_completions
+        },
+        update_columns=["consistency_score", "completion_rate", "current_streak", "longest_streak", "total_completions"]
+    ))
+    return habit_stats
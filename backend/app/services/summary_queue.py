@@ -0,0 +1,136 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.services.consistency import compute_habit_stats
+from app.services.summaries import update_habit_summary
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, int]  # (user_id, habit_id)
+
+
+class SummaryQueue:
+    """
+    Write-behind queue for HabitSummary recomputation.
+    Requests enqueue (user_id, habit_id) after committing their log change. A background
+    thread recomputes each habit's summaries once ``delay`` seconds after its first pending
+    change, so repeated toggles inside that window collapse into a single recompute.
+    """
+
+    def __init__(self, delay: float, session_factory: Callable[[], Session] = SessionLocal):
+        self.delay = delay
+        self.session_factory = session_factory
+        self._pending: Dict[Key, Set[date]] = {}
+        self._due: Dict[Key, float] = {}
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Accept work again after flush(). Called on startup; the worker starts with the first change."""
+        with self._condition:
+            self._closed = False
+            self._thread = None
+
+    def enqueue(self, user_id: int, habit_id: int, summary_dates: Iterable[date]):
+        """
+        Schedule a summary recompute for the habit on each of ``summary_dates``.
+        Once the queue is flushed, the recompute runs inline instead.
+        """
+        with self._condition:
+            if not self._closed:
+                key = (user_id, habit_id)
+                self._pending.setdefault(key, set()).update(summary_dates)
+                self._due.setdefault(key, time.monotonic() + self.delay)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="summary-queue", daemon=True)
+                    self._thread.start()
+                self._condition.notify_all()
+                return
+        self._process({(user_id, habit_id): set(summary_dates)})
+
+    def _take(self, due_only: bool) -> Dict[Key, Set[date]]:
+        now = time.monotonic()
+        keys = [key for key, due in self._due.items() if not due_only or due <= now]
+        for key in keys:
+            del self._due[key]
+        return {key: self._pending.pop(key) for key in keys}
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed:
+                    if self._due:
+                        wait = min(self._due.values()) - time.monotonic()
+                        if wait <= 0:
+                            break
+                        self._condition.wait(wait)
+                    else:
+                        self._condition.wait()
+                if self._closed:
+                    return
+                batch = self._take(due_only=True)
+                self._busy = True
+            try:
+                self._process(batch)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _process(self, batch: Dict[Key, Set[date]]):
+        habits_by_user: Dict[int, Dict[int, Set[date]]] = defaultdict(dict)
+        for (user_id, habit_id), summary_dates in batch.items():
+            habits_by_user[user_id][habit_id] = summary_dates
+
+        for user_id, habits in habits_by_user.items():
+            db = self.session_factory()
+            try:
+                stats = compute_habit_stats(db, user_id, habits.keys())
+                for habit_id, summary_dates in habits.items():
+                    for summary_date in sorted(summary_dates):
+                        update_habit_summary(db, user_id, habit_id, summary_date, habit_stats=stats[habit_id])
+                db.commit()
+            except Exception:
+                # Summaries are derived data; the next change to the habit recomputes them
+                logger.exception(f"Summary recompute failed for user {user_id}, habits {sorted(habits)}")
+                db.rollback()
+            finally:
+                db.close()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Process everything pending now and block until the worker is idle. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            for key in self._due:
+                self._due[key] = 0
+            self._condition.notify_all()
+            while self._due or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def flush(self):
+        """Stop the worker and recompute everything still pending. Called on shutdown."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+        with self._condition:
+            batch = self._take(due_only=False)
+        if batch:
+            self._process(batch)
+
+
+summary_queue = SummaryQueue(delay=settings.summary_queue_delay)
@@ -10,6 +10,8 @@ CREATE TABLE IF NOT EXISTS users (
     email VARCHAR(255) UNIQUE NOT NULL,
     hashed_password VARCHAR(255) NOT NULL,
     is_active BOOLEAN DEFAULT TRUE,
+    data_version INTEGER NOT NULL DEFAULT 0,
+    token_version INTEGER NOT NULL DEFAULT 0,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -44,6 +46,7 @@ CREATE TABLE IF NOT EXISTS habit_logs (
     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     habit_id INTEGER NOT NULL REFERENCES habits(id) ON DELETE CASCADE,
     completed_date TIMESTAMP WITH TIME ZONE NOT NULL,
+    completed_day DATE NOT NULL,
     notes TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -52,11 +55,11 @@ CREATE TABLE IF NOT EXISTS habit_logs (
 CREATE INDEX IF NOT EXISTS idx_habit_logs_user_id ON habit_logs(user_id);
 CREATE INDEX IF NOT EXISTS idx_habit_logs_habit_id ON habit_logs(habit_id);
 CREATE INDEX IF NOT EXISTS idx_habit_logs_completed_date ON habit_logs(completed_date);
-CREATE INDEX IF NOT EXISTS idx_habit_logs_user_habit_date ON habit_logs(user_id, habit_id, completed_date);
+CREATE INDEX IF NOT EXISTS ix_habit_logs_habit_completed ON habit_logs(habit_id, completed_date, id);
+CREATE INDEX IF NOT EXISTS ix_habit_logs_user_day ON habit_logs(user_id, completed_day);
 
--- Create a unique constraint to prevent duplicate logs for the same habit on the same date
-CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_habit_log_per_date 
-ON habit_logs(user_id, habit_id, DATE(completed_date));
+-- Create a unique constraint to prevent duplicate logs for the same user, habit and day
+ALTER TABLE habit_logs ADD CONSTRAINT uq_habit_logs_user_habit_day UNIQUE (user_id, habit_id, completed_day);
 
 -- Function to update the updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -104,6 +107,18 @@ CREATE INDEX IF NOT EXISTS idx_habit_summary_user_id ON habit_summary(user_id);
 CREATE INDEX IF NOT EXISTS idx_habit_summary_habit_id ON habit_summary(habit_id);
 CREATE INDEX IF NOT EXISTS idx_habit_summary_date ON habit_summary(summary_date);
 
+-- Per-user daily totals, kept in step with habit_logs
+CREATE TABLE IF NOT EXISTS user_daily_rollup (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    completions INTEGER NOT NULL DEFAULT 0,
+    active_habits INTEGER NOT NULL DEFAULT 0,
+    habits_completed INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(user_id, day)
+);
+
 -- Trigger for habit_summary updated_at
 DROP TRIGGER IF EXISTS update_habit_summary_updated_at ON habit_summary;
 CREATE TRIGGER update_habit_summary_updated_at 
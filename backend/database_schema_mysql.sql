@@ -8,6 +8,8 @@ CREATE TABLE IF NOT EXISTS users (
     name VARCHAR(255),
     hashed_password VARCHAR(255) NOT NULL,
     is_active TINYINT(1) DEFAULT 1,
+    data_version INT NOT NULL DEFAULT 0,
+    token_version INT NOT NULL DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
 );
@@ -43,6 +45,7 @@ CREATE TABLE IF NOT EXISTS habit_logs (
     user_id INT NOT NULL,
     habit_id INT NOT NULL,
     completed_date DATETIME NOT NULL,
+    completed_day DATE NOT NULL,
     notes TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
@@ -53,11 +56,11 @@ CREATE TABLE IF NOT EXISTS habit_logs (
 CREATE INDEX idx_habit_logs_user_id ON habit_logs(user_id);
 CREATE INDEX idx_habit_logs_habit_id ON habit_logs(habit_id);
 CREATE INDEX idx_habit_logs_completed_date ON habit_logs(completed_date);
-CREATE INDEX idx_habit_logs_user_habit_date ON habit_logs(user_id, habit_id, DATE(completed_date));
+CREATE INDEX ix_habit_logs_habit_completed ON habit_logs(habit_id, completed_date, id);
+CREATE INDEX ix_habit_logs_user_day ON habit_logs(user_id, completed_day);
 
--- Create a unique constraint to prevent duplicate logs for the same habit on the same date
-CREATE UNIQUE INDEX idx_unique_habit_log_per_date 
-ON habit_logs(user_id, habit_id, DATE(completed_date));
+-- Create a unique constraint to prevent duplicate logs for the same user, habit and day
+ALTER TABLE habit_logs ADD CONSTRAINT uq_habit_logs_user_habit_day UNIQUE (user_id, habit_id, completed_day);
 
 -- Habit Summary table for storing aggregated progress data
 CREATE TABLE IF NOT EXISTS habit_summary (
@@ -81,6 +84,19 @@ CREATE INDEX idx_habit_summary_user_id ON habit_summary(user_id);
 CREATE INDEX idx_habit_summary_habit_id ON habit_summary(habit_id);
 CREATE INDEX idx_habit_summary_summary_date ON habit_summary(summary_date);
 
+-- Per-user daily totals, kept in step with habit_logs
+CREATE TABLE IF NOT EXISTS user_daily_rollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    day DATE NOT NULL,
+    completions INT NOT NULL DEFAULT 0,
+    active_habits INT NOT NULL DEFAULT 0,
+    habits_completed INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    UNIQUE (user_id, day)
+);
+
 -- View for habit statistics (optional)
 CREATE OR REPLACE VIEW habit_stats AS
 SELECT 
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Import habit logs for one user from a CSV or NDJSON file (optionally gzipped)
+Usage: python import_logs.py FILE --user-email EMAIL [--format csv|ndjson] [--batch-size N]
+"""
+
+import sys
+import os
+import gzip
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.importer import BATCH_SIZE, import_logs, parse_records
+
+def main():
+    parser = argparse.ArgumentParser(description="Import habit logs from CSV or NDJSON")
+    parser.add_argument("file", help="File to import (.csv, .ndjson, optionally .gz)")
+    parser.add_argument("--user-email", required=True, help="User to import the logs for")
+    parser.add_argument("--format", choices=["csv", "ndjson"], help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rows per multi-row insert")
+    args = parser.parse_args()
+
+    name = args.file[:-3] if args.file.endswith(".gz") else args.file
+    format = args.format or ("csv" if name.endswith(".csv") else "ndjson")
+    opener = gzip.open if args.file.endswith(".gz") else open
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == args.user_email).first()
+        if not user:
+            print(f"❌ No user with email {args.user_email}")
+            sys.exit(1)
+
+        def report(result):
+            print(f"  ⏳ {result.rows} rows read, {result.inserted} inserted ({result.rows_per_second:.0f} rows/s)", flush=True)
+
+        with opener(args.file, "rt", encoding="utf-8-sig", newline="") as f:
+            result = import_logs(db, user.id, parse_records(f, format), batch_size=args.batch_size, progress=report)
+        db.commit()
+
+        for error in result.errors:
+            print(f"  ❌ {error}")
+        print(f"✅ Imported {result.inserted} logs from {result.rows} rows in {result.seconds:.1f}s ({result.rows_per_second:.0f} rows/s)")
+        print(f"   {result.duplicates} duplicates skipped, {result.failed} rows failed, {result.habits_created} habits created")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,8 @@ from app.models.user import User
 from app.models.habit import Habit, HabitLog
 from app.models.habit_summary import HabitSummary
 from app.auth import get_password_hash
+from app.services.log_indexes import rebuild_log_indexes
+from app.services.rollups import rebuild_daily_rollups
 from sqlalchemy import text
 
 class Colors:
@@ -123,7 +125,7 @@ def create_tables():
     """Create all database tables"""
     print_info("Creating database tables...")
     try:
-        from app.models import user, habit, habit_summary
+        from app.models import user, habit, habit_summary, habit_bitmap, streak_run
         from app.database import Base
         Base.metadata.create_all(bind=engine)
         print_success("Database tables created successfully")
@@ -139,6 +141,9 @@ def clear_existing_data(db: Session):
         # Delete in correct order to avoid foreign key constraints
         db.execute(text("DELETE FROM habit_summary WHERE user_id IN (SELECT id FROM users WHERE email LIKE 'demo%')"))
         db.execute(text("DELETE FROM habit_logs WHERE user_id IN (SELECT id FROM users WHERE email LIKE 'demo%')"))
+        db.execute(text("DELETE FROM habit_log_bitmaps WHERE user_id IN (SELECT id FROM users WHERE email LIKE 'demo%')"))
+        db.execute(text("DELETE FROM habit_streak_runs WHERE user_id IN (SELECT id FROM users WHERE email LIKE 'demo%')"))
+        db.execute(text("DELETE FROM user_daily_rollup WHERE user_id IN (SELECT id FROM users WHERE email LIKE 'demo%')"))
         db.execute(text("DELETE FROM habits WHERE user_id IN (SELECT id FROM users WHERE email LIKE 'demo%')"))
         db.execute(text("DELETE FROM users WHERE email LIKE 'demo%'"))
         db.commit()
@@ -236,6 +241,9 @@ def create_habit_logs(db: Session, user: User, habits_with_rates):
         
         print_info(f"  {habit.name}: {habit_logs} completions")
     
+    db.commit()
+    rebuild_log_indexes(db, [habit.id for habit, _ in habits_with_rates])
+    rebuild_daily_rollups(db, {habit.user_id for habit, _ in habits_with_rates})
     db.commit()
     print_success(f"Created {total_logs} habit logs")
 
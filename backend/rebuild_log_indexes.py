@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Rebuild or verify the habit log indexes derived from habit_logs (rebuild also covers daily rollups)
+Usage: python rebuild_log_indexes.py [--verify] [--user-email EMAIL]
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.habit import Habit
+from app.services.log_indexes import rebuild_log_indexes, verify_log_indexes
+from app.services.rollups import rebuild_daily_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild or verify habit log indexes")
+    parser.add_argument("--verify", action="store_true", help="Only compare indexes against habit_logs")
+    parser.add_argument("--user-email", help="Limit to a single user")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        query = db.query(Habit.id, Habit.user_id)
+        if args.user_email:
+            query = query.join(User).filter(User.email == args.user_email)
+        owners = dict(query)
+        habit_ids = list(owners)
+        print(f"Found {len(habit_ids)} habits")
+
+        if args.verify:
+            mismatches = verify_log_indexes(db, habit_ids)
+            for mismatch in mismatches:
+                print(f"  ❌ {mismatch.index} habit {mismatch.habit_id} {mismatch.day}: {mismatch.detail}")
+            if mismatches:
+                print(f"❌ {len(mismatches)} index mismatches")
+                sys.exit(1)
+            print("✅ Log indexes match habit_logs")
+            return
+
+        rebuild_log_indexes(db, habit_ids)
+        rebuild_daily_rollups(db, set(owners.values()))
+        db.commit()
+        print(f"✅ Rebuilt log indexes for {len(habit_ids)} habits and daily rollups for {len(set(owners.values()))} users")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
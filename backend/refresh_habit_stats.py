@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""
+Refresh the stored currentWeek, consistency and streak of every habit whose
+stats were computed for an earlier day. Run shortly after midnight (UTC).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.services.consistency import refresh_stale_habit_stats
+
+def main():
+    db = SessionLocal()
+    try:
+        refreshed = refresh_stale_habit_stats(db)
+        db.commit()
+        print(f"✅ Refreshed stats for {refreshed} habits")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
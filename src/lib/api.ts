@@ -89,6 +89,32 @@ export const deleteHabitLog = async (habitId: string, completedDate: string) =>
   });
 };
 
+export interface HabitCalendarRow {
+  habit_id: number;
+  name: string;
+  icon: string;
+  completed: number;
+  days: boolean[];
+}
+
+// Completion matrix of all active habits for any range of up to a year (dates as YYYY-MM-DD)
+export const getHabitCalendar = async (from?: string, to?: string) => {
+  const params = new URLSearchParams();
+  if (from) params.set("from", from);
+  if (to) params.set("to", to);
+  const calendar = await fetchWithAuth(`${API_BASE_URL}/habits/calendar?${params}`);
+  return {
+    start: calendar.start as string,
+    end: calendar.end as string,
+    habits: calendar.habits.map((row: { bits: string } & Omit<HabitCalendarRow, "days">) => {
+      // Bit N of the little-endian bitset is day start + N
+      const bytes = atob(row.bits);
+      const days = Array.from({ length: calendar.days }, (_, i) => ((bytes.charCodeAt(i >> 3) >> (i & 7)) & 1) === 1);
+      return { habit_id: row.habit_id, name: row.name, icon: row.icon, completed: row.completed, days };
+    }) as HabitCalendarRow[],
+  };
+};
+
 interface HabitUpdate {
   name?: string;
   description?: string;
@@ -21,6 +21,7 @@ interface OverallSummary {
   longest_streak: number; total_completions: number;
 }
 interface WeeklySummary { week_start: string; completion_rate: number; }
+interface SeriesPoint { start: string; end: string; completions: number; completion_rate: number; }
 interface HabitSummaryData {
   habit_id: string; habit_name: string; current_streak: number;
   longest_streak: number; total_completions: number; completion_rate: number;
@@ -55,22 +56,50 @@ export default function Summary() {
   const [weekly, setWeekly] = useState<WeeklySummary[]>([]);
   const [topHabits, setTopHabits] = useState<HabitSummaryData[]>([]);
   const [daily, setDaily] = useState<DailyCompletion[]>([]);
+  const [year, setYear] = useState<DailyCompletion[]>([]);
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
     const fetch_ = async () => {
       setLoading(true);
       try {
-        const [ov, wk, top, dc] = await Promise.allSettled([
-          fetchWithAuth(`${API_BASE_URL}/summary/overall`),
-          fetchWithAuth(`${API_BASE_URL}/summary/weekly`),
-          fetchWithAuth(`${API_BASE_URL}/summary/top-habits`),
-          fetchWithAuth(`${API_BASE_URL}/summary/daily-completions`),
+        // Settled separately so a failing request only leaves its own panels empty.
+        // The heatmap carries an ETag, so the browser revalidates it instead of re-downloading the year
+        const [dashboard, heatmap] = await Promise.allSettled([
+          fetchWithAuth(`${API_BASE_URL}/summary/dashboard`),
+          fetchWithAuth(`${API_BASE_URL}/summary/heatmap`),
         ]);
-        if (ov.status === "fulfilled") setOverall(ov.value);
-        if (wk.status === "fulfilled") setWeekly(Array.isArray(wk.value) ? wk.value : []);
-        if (top.status === "fulfilled") setTopHabits(Array.isArray(top.value) ? top.value : []);
-        if (dc.status === "fulfilled") setDaily(Array.isArray(dc.value) ? dc.value : []);
+        if (dashboard.status === "fulfilled") {
+          setOverall(dashboard.value.overall ?? null);
+          setWeekly(Array.isArray(dashboard.value.weekly) ? dashboard.value.weekly : []);
+          setTopHabits(Array.isArray(dashboard.value.top_habits) ? dashboard.value.top_habits : []);
+          setDaily(Array.isArray(dashboard.value.daily_completions) ? dashboard.value.daily_completions : []);
+        } else {
+          // Fall back to one request per panel
+          const [ov, wk, top, dc] = await Promise.allSettled([
+            fetchWithAuth(`${API_BASE_URL}/summary/overall`),
+            fetchWithAuth(`${API_BASE_URL}/summary/series?bucket=week`),
+            fetchWithAuth(`${API_BASE_URL}/summary/top-habits`),
+            fetchWithAuth(`${API_BASE_URL}/summary/daily-completions`),
+          ]);
+          if (ov.status === "fulfilled") setOverall(ov.value);
+          if (wk.status === "fulfilled") {
+            const points: SeriesPoint[] = Array.isArray(wk.value?.points) ? wk.value.points : [];
+            setWeekly(points.map((p) => ({ week_start: p.start, completion_rate: p.completion_rate })));
+          }
+          if (top.status === "fulfilled") setTopHabits(Array.isArray(top.value) ? top.value : []);
+          if (dc.status === "fulfilled") setDaily(Array.isArray(dc.value) ? dc.value : []);
+        }
+        if (heatmap.status === "fulfilled" && Array.isArray(heatmap.value.counts)) {
+          const { start, counts } = heatmap.value;
+          setYear(
+            counts.map((count: number, i: number) => {
+              const day = new Date(`${start}T00:00:00Z`);
+              day.setUTCDate(day.getUTCDate() + i);
+              return { date: day.toISOString().split("T")[0], count };
+            })
+          );
+        }
       } catch (e) {
         console.error(e);
       } finally {
@@ -90,8 +119,8 @@ export default function Summary() {
     unlocked: overall ? m.req(overall) : false,
   }));
 
-  // Map daily completions to heatmap format
-  const heatmapData = daily.map(d => {
+  // Map the year of daily completions to heatmap format
+  const heatmapData = year.map(d => {
     let level = 0;
     if (d.count === 0) level = 0;
     else if (d.count <= 1) level = 1;
@@ -294,8 +323,8 @@ export default function Summary() {
             
             <div className="flex items-center gap-3 bg-muted/30 px-3 py-1.5 rounded-full">
               {[
-                { label: "Total", val: daily.reduce((s, d) => s + d.count, 0), icon: Award },
-                { label: "Active", val: daily.filter((d) => d.count > 0).length, icon: Calendar },
+                { label: "Total", val: year.reduce((s, d) => s + d.count, 0), icon: Award },
+                { label: "Active", val: year.filter((d) => d.count > 0).length, icon: Calendar },
               ].map(({ label, val, icon: Icon }) => (
                 <div key={label} className="flex items-center gap-1.5 px-1 border-r last:border-0 border-border/50 pr-3 last:pr-1">
                   <Icon className="w-3 h-3 text-primary" />